@@ -0,0 +1,42 @@
+"""Сравнение count_emoji со старым подсчётом эмодзи из check_spam.
+
+Запуск: python benchmarks/bench_emoji.py
+"""
+import sys
+import timeit
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent.parent))
+from utils.emoji_detector import count_emoji
+
+OLD_EMOJI_CHARS = (
+    '😀😃😄😁😆😅😂🤣😊😇🙂🙃😉😌😍🥰😘😗😙😚😋😛😝😜🤪🤨🧐🤓😎🤩🥳😏😒😞😔😟😕🙁☹️😣😖😫😩🥺😢😭😤😠😡🤬🤯😳'
+    '🥵🥶😱😨😰😥😓🤗🤔🤭🤫🤥😶😐😑😯😦😧😮😲🥱😴🤤😪😵🤐🥴🤢🤮🤧😷🤒🤕🤑🤠💀👻👽👾🤖😺😸😹😻😼😽🙀😿😾'
+)
+NUMBER = 200
+
+MESSAGES = {
+    'ascii text, 2000 chars': ('lorem ipsum dolor sit amet ' * 80)[:2000],
+    'cyrillic text, 2000 chars': ('бесплатный нитро только сегодня ' * 70)[:2000],
+    'emoji flood, 2000 chars': '😀😂🔥👍🏽🇷🇺❤️' * 180,
+    'custom emoji flood': '<:pepe:123456789012345678> ' * 70,
+}
+
+
+def old_count(content):
+    emoji_chars = OLD_EMOJI_CHARS
+    return len([c for c in content if c in emoji_chars])
+
+
+def main():
+    print(f"{'message':<28} {'old, us':>9} {'full, us':>9} {'limit=6, us':>12} {'old n':>6} {'new n':>6}")
+    for name, content in MESSAGES.items():
+        old = min(timeit.repeat(lambda: old_count(content), number=NUMBER, repeat=5)) / NUMBER
+        full = min(timeit.repeat(lambda: count_emoji(content), number=NUMBER, repeat=5)) / NUMBER
+        limited = min(timeit.repeat(lambda: count_emoji(content, limit=6), number=NUMBER, repeat=5)) / NUMBER
+        print(f"{name:<28} {old * 1e6:>9.1f} {full * 1e6:>9.1f} {limited * 1e6:>12.1f} "
+              f"{old_count(content):>6} {count_emoji(content):>6}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,37 @@
+"""Стоимость normalize_text по сравнению со старым message.content.lower().
+
+Запуск: python benchmarks/bench_text_normalizer.py
+"""
+import sys
+import timeit
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent.parent))
+from utils.text_normalizer import normalize_text, NormalizedTextCache
+
+NUMBER = 20000
+
+MESSAGES = {
+    'short ascii': 'hey, anyone up for a game tonight?',
+    'ascii, 300 chars': ('lorem ipsum dolor sit amet, consectetur adipiscing elit. ' * 6)[:300],
+    'cyrillic': 'привет всем, кто сегодня вечером играет?',
+    'homoglyphs': 'fr\u0435\u0435 n\u0456tr\u043e \u0437\u0434\u0435\u0441\u044c',
+    'fullwidth': '\uff46\uff52\uff45\uff45 \uff4e\uff49\uff54\uff52\uff4f',
+    'letter-spaced': 'f r e e   n i t r o   h e r e',
+    'zero-width': 'n\u200bi\u200bt\u200br\u200bo',
+}
+
+
+def main():
+    print(f"{'message':<18} {'lower, us':>10} {'normalize, us':>14} {'cached, us':>11}  result")
+    cache = NormalizedTextCache()
+    for name, content in MESSAGES.items():
+        lower = min(timeit.repeat(lambda: content.lower(), number=NUMBER, repeat=5)) / NUMBER
+        full = min(timeit.repeat(lambda: normalize_text(content), number=NUMBER, repeat=5)) / NUMBER
+        cached = min(timeit.repeat(lambda: cache.get(1, content), number=NUMBER, repeat=5)) / NUMBER
+        print(f"{name:<18} {lower * 1e6:>10.2f} {full * 1e6:>14.2f} {cached * 1e6:>11.2f}  "
+              f"{normalize_text(content).encode('ascii', 'backslashreplace').decode()}")
+
+
+if __name__ == '__main__':
+    main()
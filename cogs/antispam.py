@@ -4,35 +4,94 @@ from datetime import datetime, timedelta, timezone
 from main import format_duration
 import config
 import asyncio
-from collections import defaultdict, deque
+from collections import deque
 import json
 from pathlib import Path
 import logging
+import re
+import sys
+import time
+
+sys.path.append(str(Path(__file__).parent.parent))
+from utils.ttl_set import TTLSet, TTLDict
+from utils.memory import approx_size
+from utils.emoji_detector import count_emoji
+from utils.alert_channels import alert_channel_resolver
+from utils.audit_log_cache import AuditLogCorrelator
+from utils.rate_limiter import RateLimiter
+from utils.config_manager import config_manager
+from utils.spam_policy import SpamPolicyTable
+from utils.duplicate_detector import DuplicateDetector
+from utils.text_normalizer import NormalizedTextCache
+from utils.blocked_words import blocked_words
+from utils.enforcement import LatencyHistogram, RestSpend, NotificationCoalescer
+from utils.recent_messages import RecentMessages
+from utils.webhook_cache import WebhookCache
 
 logger = logging.getLogger(__name__)
 
-# Список запрещённых слов (загружается из файла)
-BLOCKED_WORDS_FILE = Path('discord_blocked_words_full.txt')
-BLOCKED_WORDS = []
-try:
-    with BLOCKED_WORDS_FILE.open(encoding='utf-8') as f:
-        BLOCKED_WORDS = [line.strip().lower() for line in f if line.strip()]
-except FileNotFoundError:
-    BLOCKED_WORDS = []
-
-# Параметры антиспама
-SPAM_THRESHOLD = 5      # сообщений
-SPAM_WINDOW = 10        # секунд
-MENTION_SPAM_THRESHOLD = 5  # упоминаний
-MENTION_SPAM_WINDOW = 10    # секунд
-EMOJI_SPAM_THRESHOLD = 10   # эмодзи
-EMOJI_SPAM_WINDOW = 10      # секунд
+# Список запрещённых слов: utils/blocked_words.py (discord_blocked_words_full.txt,
+# перечитывается при изменении файла, матчер собирается в отдельном потоке)
+
+# Пороги и окна правил (spam, mention, emoji, bot, nuke) хранятся в config_manager:
+# значения по умолчанию и переопределения для гильдий в bot_config.json
+SPAM_SETTINGS_FILE = Path('antispam_settings.json')  # Старый формат, импортируется при первом запуске
+EMOJI_PER_MESSAGE = 5       # эмодзи в сообщении, после которых оно считается спамом
 
 # Параметры анти-nuke
-NUKE_ACTION_THRESHOLD = 3    # действий
-NUKE_ACTION_WINDOW = 30      # секунд
 NUKE_ALERT_THRESHOLD = 2     # действий для алерта
 
+# Настройки, которые меняет команда setspam
+SPAM_SETTINGS = (
+    'spam_threshold', 'spam_window', 'mention_threshold', 'mention_window',
+    'emoji_threshold', 'emoji_window', 'bot_threshold', 'bot_window',
+    'duplicate_threshold', 'duplicate_window',
+    'nuke_threshold', 'nuke_window',
+)
+
+# Счётчики без активности дольше этого срока удаляются
+RATE_LIMIT_IDLE_TTL = 300   # секунд
+RATE_LIMIT_EVICT_INTERVAL = 60  # секунд
+
+# История анти-nuke: записи без новых действий удаляются
+NUKE_HISTORY_TTL = 600       # секунд
+NUKE_HISTORY_MAXLEN = 10000  # пользователей
+MEMBER_LEAVES_MAXLEN = 1000  # выходов на гильдию в окне анти-nuke
+
+# Флуд одинаковыми сообщениями: кластеров на гильдию и срок жизни неактивного кластера
+DUPLICATE_MAX_CLUSTERS = 1000
+DUPLICATE_IDLE_TTL = 300    # секунд
+# Рейд - это одинаковые сообщения от нескольких аккаунтов с признаком риска
+# (ссылка, упоминание, новый аккаунт или участник); просто популярная фраза не наказывается
+DUPLICATE_MIN_AUTHORS = 3
+DUPLICATE_ACTIVITY_SHARE = 0.1  # порог не ниже этой доли всех сообщений гильдии за окно
+NEW_ACCOUNT_AGE = timedelta(days=7)
+NEW_MEMBER_AGE = timedelta(days=1)
+LINK_PATTERN = re.compile(r'https?://|discord(?:app)?\.(?:gg|com/invite)/|\bwww\.', re.IGNORECASE)
+
+# Сколько сообщений хранить в кэше приведённого текста
+NORMALIZED_CACHE_SIZE = 2048
+
+# Наказание за спам
+SPAM_TIMEOUT = timedelta(minutes=5)
+SPAM_ENFORCEMENT_TTL = 10   # секунд: пока мут выдаётся, новые срабатывания только удаляют сообщения
+SPAM_NOTIFY_DELAY = 2       # секунд: уведомления канала за это время собираются в одно
+SPAM_NOTIFY_MAX_USERS = 20  # пользователей в тексте сводного уведомления
+REST_SPEND_WINDOW = 60      # секунд: окно учёта REST-запросов гильдии
+
+# Последние сообщения каналов: при муте удаляются все недавние сообщения спамера
+RECENT_MESSAGES_PER_CHANNEL = 200
+RECENT_MESSAGES_MAX_CHANNELS = 100  # каналов на гильдию
+SPAM_PURGE_WINDOW = 60      # секунд: сколько сообщений спамера удалять задним числом
+BULK_DELETE_LIMIT = 100     # сообщений за один запрос (ограничение Discord)
+
+# Сколько помнить удалённые сообщения (по событиям шлюза)
+DELETED_MESSAGES_TTL = 300      # секунд
+DELETED_MESSAGES_MAXLEN = 50000 # записей
+
+# Сколько наказанных вебхуков и ботов помнить одновременно
+PROCESSED_MAXLEN = 10000
+
 class AntiSpamCog(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
@@ -41,35 +100,147 @@ class AntiSpamCog(commands.Cog):
         self.whitelisted_bots = {
             536991182035746816,  # Замените на ID бота Wick
         }
+        # Владельцы вебхуков: загружаются при старте и обновляются по on_webhooks_update,
+        # чтобы сообщения вебхуков из белого списка не стоили ни одного REST-запроса
+        self.webhook_cache = WebhookCache(self.whitelisted_bots)
+        
+        # Антиспам: скользящие окна по (гильдия, пользователь, правило)
+        self.rate_limiter = RateLimiter(idle_ttl=RATE_LIMIT_IDLE_TTL)
+        # Пороги гильдий: политика берётся один раз на сообщение
+        self.policies = SpamPolicyTable(config_manager)
+        # Одинаковые и почти одинаковые сообщения по всей гильдии (рейды с разных аккаунтов)
+        self.duplicates = DuplicateDetector(
+            max_clusters=DUPLICATE_MAX_CLUSTERS,
+            min_authors=DUPLICATE_MIN_AUTHORS,
+            activity_share=DUPLICATE_ACTIVITY_SHARE
+        )
+        # Приведённый текст (NFKC, гомоглифы, разрядка) считается один раз на сообщение
+        self.normalized = NormalizedTextCache(maxlen=NORMALIZED_CACHE_SIZE)
         
-        # Антиспам для всех пользователей
-        self.spam_history = defaultdict(lambda: deque(maxlen=SPAM_THRESHOLD))
-        self.mention_spam_history = defaultdict(lambda: deque(maxlen=MENTION_SPAM_THRESHOLD))
-        self.emoji_spam_history = defaultdict(lambda: deque(maxlen=EMOJI_SPAM_THRESHOLD))
+        # Наказание за спам: (гильдия, пользователь), которым мут уже выдаётся
+        self.enforcing = TTLSet(SPAM_ENFORCEMENT_TTL)
+        # Сводные уведомления по каналам: одно сообщение на рейд вместо N
+        self.spam_notifier = NotificationCoalescer(self.send_spam_notification, delay=SPAM_NOTIFY_DELAY)
+        # REST-запросы по гильдиям и задержка от отправки сообщения до мута
+        self.rest_spend = RestSpend(REST_SPEND_WINDOW)
+        self.timeout_latency = LatencyHistogram()
+        # Недавние сообщения по каналам: (ID, автор, время) для массового удаления
+        self.recent_messages = RecentMessages(RECENT_MESSAGES_PER_CHANNEL, RECENT_MESSAGES_MAX_CHANNELS)
         
         # Анти-nuke для администраторов
-        self.nuke_history = defaultdict(lambda: deque(maxlen=NUKE_ACTION_THRESHOLD))
+        self.nuke_history = TTLDict(
+            NUKE_HISTORY_TTL,
+            maxlen=NUKE_HISTORY_MAXLEN,
+            default_factory=lambda: deque(maxlen=config_manager.get(None, 'nuke_threshold'))
+        )
         self.nuke_alerts = set()
+        # Общий кэш журнала аудита: одна выборка на всплеск событий
+        self.audit_log = AuditLogCorrelator()
+        # Выходы участников: журнал аудита читается только при всплеске выходов
+        self.member_leaves = TTLDict(NUKE_HISTORY_TTL, default_factory=lambda: deque(maxlen=MEMBER_LEAVES_MAXLEN))
+        self.kick_watch = TTLDict(NUKE_HISTORY_TTL)  # гильдия -> до какого момента проверять каждый выход
         
         # Временные муты
         self.temp_mutes = {}
         
         # Защита от спама логов
-        self.processed_webhooks = set()
         self.webhook_cooldown = 60  # секунд
-        self.notification_cooldown = {}  # Для защиты от спама уведомлений
+        # Уже наказанные вебхуки и боты: у каждой записи свой срок, чистит evict_idle_loop
+        self.processed_webhooks = TTLSet(self.webhook_cooldown, maxlen=PROCESSED_MAXLEN)
+        self.processed_bots = TTLSet(self.webhook_cooldown, maxlen=PROCESSED_MAXLEN)
         self.notification_delay = 30  # секунд между уведомлениями
+        # Для защиты от спама уведомлений (запись живёт ровно время кулдауна)
+        self.notification_cooldown = TTLDict(self.notification_delay)
+        
+        # Недавно удалённые сообщения вместо fetch_message на каждое сообщение
+        self.deleted_messages = TTLSet(DELETED_MESSAGES_TTL, maxlen=DELETED_MESSAGES_MAXLEN)
+        self.fetch_calls_saved = 0  # Сколько REST-запросов не понадобилось
         
         # Загружаем настройки
         self.load_settings()
+        
+        self.evict_task = self.bot.loop.create_task(self.evict_idle_loop())
+        # Следим за файлом запрещённых слов (правки вручную подхватываются без перезапуска)
+        self.blocked_words_task = self.bot.loop.create_task(blocked_words.watch())
+        # Подхватываем настройки, сохранённые другими процессами бота (--processes)
+        self.config_watch_task = self.bot.loop.create_task(config_manager.watch())
+
+    def cog_unload(self):
+        self.evict_task.cancel()
+        self.blocked_words_task.cancel()
+        self.config_watch_task.cancel()
+        self.spam_notifier.cancel()
+
+    async def evict_idle_loop(self):
+        """Периодически удаляет счётчики неактивных пользователей и устаревшие записи"""
+        while True:
+            await asyncio.sleep(RATE_LIMIT_EVICT_INTERVAL)
+            evicted = self.rate_limiter.evict_idle()
+            evicted += self.nuke_history.purge()
+            evicted += self.member_leaves.purge()
+            evicted += self.kick_watch.purge()
+            evicted += self.notification_cooldown.purge()
+            evicted += self.deleted_messages.purge()
+            evicted += self.processed_webhooks.purge()
+            evicted += self.processed_bots.purge()
+            evicted += self.duplicates.purge(DUPLICATE_IDLE_TTL)
+            evicted += self.enforcing.purge()
+            evicted += self.rest_spend.purge()
+            evicted += self.recent_messages.purge(SPAM_PURGE_WINDOW, datetime.now(timezone.utc).timestamp())
+            if evicted:
+                logger.debug(f"[AntiSpam] Удалено устаревших записей: {evicted}")
+
+    def memory_stats(self):
+        """Количество записей и примерный размер (байт) для каждой структуры состояния"""
+        structures = {
+            "rate_limiter": self.rate_limiter,
+            "nuke_history": self.nuke_history,
+            "nuke_alerts": self.nuke_alerts,
+            "member_leaves": self.member_leaves,
+            "notification_cooldown": self.notification_cooldown,
+            "deleted_messages": self.deleted_messages,
+            "processed_webhooks": self.processed_webhooks,
+            "processed_bots": self.processed_bots,
+            "policies": self.policies,
+            "duplicates": self.duplicates,
+            "normalized": self.normalized,
+            "enforcing": self.enforcing,
+            "spam_notifier": self.spam_notifier,
+            "rest_spend": self.rest_spend,
+            "recent_messages": self.recent_messages,
+            "webhook_cache": self.webhook_cache,
+        }
+        return {name: (len(obj), approx_size(obj)) for name, obj in structures.items()}
+
+    def get_policy(self, message):
+        """Политика антиспама гильдии сообщения"""
+        return self.policies.get(message.guild.id if message.guild else None)
+
+    @staticmethod
+    def is_raid_risk(message):
+        """Признаки рейдового сообщения: ссылка, упоминание, новый аккаунт или недавно зашедший участник"""
+        if message.mentions or message.role_mentions or message.mention_everyone:
+            return True
+        if LINK_PATTERN.search(message.content):
+            return True
+        now = datetime.now(timezone.utc)
+        author = message.author
+        if now - author.created_at < NEW_ACCOUNT_AGE:
+            return True
+        joined_at = getattr(author, "joined_at", None)
+        return joined_at is not None and now - joined_at < NEW_MEMBER_AGE
+
+    def check_rate(self, message, rule, policy):
+        """Учитывает сообщение в окне правила и возвращает True, если порог превышен.
+        Окно с другим порогом перестраивается при следующем сообщении."""
+        guild_id = message.guild.id if message.guild else 0
+        limit, window = policy.rules[rule]
+        return self.rate_limiter.hit(guild_id, message.author.id, rule, limit, window)
 
     # === Управление запрещёнными словами (команды) ===
     @commands.command(name="blocked", help="Показать запрещённые слова (первые 50)")
     async def cmd_blocked_list(self, ctx):
-        words = []
-        if BLOCKED_WORDS_FILE.exists():
-            with BLOCKED_WORDS_FILE.open(encoding='utf-8') as f:
-                words = [line.strip() for line in f if line.strip()]
+        words = blocked_words.words
         if not words:
             await ctx.send("Список пуст.")
             return
@@ -85,109 +256,95 @@ class AntiSpamCog(commands.Cog):
         if not word:
             await ctx.send("Укажите слово.")
             return
-        existing = set()
-        if BLOCKED_WORDS_FILE.exists():
-            with BLOCKED_WORDS_FILE.open(encoding='utf-8') as f:
-                existing = set(line.strip().lower() for line in f if line.strip())
-        if word in existing:
+        # Файл переписывается и матчер пересобирается в отдельном потоке
+        if not await blocked_words.add([word]):
             await ctx.send("Это слово уже есть в списке.")
             return
-        with BLOCKED_WORDS_FILE.open('a', encoding='utf-8') as f:
-            f.write(word + '\n')
-        # Обновляем кэш
-        existing.add(word)
-        global BLOCKED_WORDS
-        BLOCKED_WORDS = list(existing)
         await ctx.send(f"Добавлено: `{word}`")
 
     @commands.command(name="delword", help="Удалить слово из блок-листа")
     @commands.has_permissions(administrator=True)
     async def cmd_del_word(self, ctx, *, word: str):
         word = (word or "").strip().lower()
-        if not word or not BLOCKED_WORDS_FILE.exists():
+        if not word or not blocked_words:
             await ctx.send("Слово не найдено или файл пуст.")
             return
-        with BLOCKED_WORDS_FILE.open(encoding='utf-8') as f:
-            words = [line.strip() for line in f if line.strip()]
-        new_words = [w for w in words if w.lower() != word]
-        if len(new_words) == len(words):
+        if not await blocked_words.remove([word]):
             await ctx.send("Такого слова нет в списке.")
             return
-        with BLOCKED_WORDS_FILE.open('w', encoding='utf-8') as f:
-            for w in new_words:
-                f.write(w + '\n')
-        # Обновляем кэш
-        global BLOCKED_WORDS
-        BLOCKED_WORDS = [w.lower() for w in new_words]
         await ctx.send(f"Удалено: `{word}`")
 
+    @commands.command(name="importwords", help="Импортировать слова из приложенного .txt (одно слово на строку)")
+    @commands.has_permissions(administrator=True)
+    async def cmd_import_words(self, ctx):
+        if not ctx.message.attachments:
+            await ctx.send("Приложите текстовый файл со словами (одно на строку).")
+            return
+        try:
+            data = await ctx.message.attachments[0].read()
+            lines = data.decode('utf-8-sig').splitlines()
+        except UnicodeDecodeError:
+            await ctx.send("Файл должен быть в кодировке UTF-8.")
+            return
+        async with ctx.typing():
+            added = await blocked_words.add(lines)
+        await ctx.send(f"Добавлено слов: {len(added)} (всего: {len(blocked_words)})")
+
     def load_settings(self):
-        """Загружает настройки из файла"""
-        settings_file = Path('antispam_settings.json')
-        if settings_file.exists():
-            try:
-                with settings_file.open(encoding='utf-8') as f:
-                    settings = json.load(f)
-                    global SPAM_THRESHOLD, SPAM_WINDOW, MENTION_SPAM_THRESHOLD, MENTION_SPAM_WINDOW
-                    global EMOJI_SPAM_THRESHOLD, EMOJI_SPAM_WINDOW, NUKE_ACTION_THRESHOLD, NUKE_ACTION_WINDOW
-                    SPAM_THRESHOLD = settings.get('spam_threshold', SPAM_THRESHOLD)
-                    SPAM_WINDOW = settings.get('spam_window', SPAM_WINDOW)
-                    MENTION_SPAM_THRESHOLD = settings.get('mention_spam_threshold', MENTION_SPAM_THRESHOLD)
-                    MENTION_SPAM_WINDOW = settings.get('mention_spam_window', MENTION_SPAM_WINDOW)
-                    EMOJI_SPAM_THRESHOLD = settings.get('emoji_spam_threshold', EMOJI_SPAM_THRESHOLD)
-                    EMOJI_SPAM_WINDOW = settings.get('emoji_spam_window', EMOJI_SPAM_WINDOW)
-                    NUKE_ACTION_THRESHOLD = settings.get('nuke_action_threshold', NUKE_ACTION_THRESHOLD)
-                    NUKE_ACTION_WINDOW = settings.get('nuke_action_window', NUKE_ACTION_WINDOW)
-            except Exception as e:
-                logger.error(f"Ошибка загрузки настроек антиспама: {e}")
-
-    def save_settings(self):
-        """Сохраняет настройки в файл"""
-        settings = {
-            'spam_threshold': SPAM_THRESHOLD,
-            'spam_window': SPAM_WINDOW,
-            'mention_spam_threshold': MENTION_SPAM_THRESHOLD,
-            'mention_spam_window': MENTION_SPAM_WINDOW,
-            'emoji_spam_threshold': EMOJI_SPAM_THRESHOLD,
-            'emoji_spam_window': EMOJI_SPAM_WINDOW,
-            'nuke_action_threshold': NUKE_ACTION_THRESHOLD,
-            'nuke_action_window': NUKE_ACTION_WINDOW
+        """Переносит старый antispam_settings.json в настройки по умолчанию (один раз)"""
+        if not SPAM_SETTINGS_FILE.exists():
+            return
+        # Старые ключи -> поля GuildSettings
+        legacy_keys = {
+            'spam_threshold': 'spam_threshold',
+            'spam_window': 'spam_window',
+            'mention_spam_threshold': 'mention_threshold',
+            'mention_spam_window': 'mention_window',
+            'emoji_spam_threshold': 'emoji_threshold',
+            'emoji_spam_window': 'emoji_window',
+            'nuke_action_threshold': 'nuke_threshold',
+            'nuke_action_window': 'nuke_window',
         }
-        settings_file = Path('antispam_settings.json')
-        with settings_file.open('w', encoding='utf-8') as f:
-            json.dump(settings, f, ensure_ascii=False, indent=2)
+        try:
+            with SPAM_SETTINGS_FILE.open(encoding='utf-8') as f:
+                settings = json.load(f)
+            config_manager.set(None, **{
+                name: settings[key] for key, name in legacy_keys.items() if key in settings
+            })
+            config_manager.flush()
+            SPAM_SETTINGS_FILE.rename(SPAM_SETTINGS_FILE.with_name(SPAM_SETTINGS_FILE.name + '.migrated'))
+            logger.info("Настройки антиспама перенесены в bot_config.json")
+        except Exception as e:
+            logger.error(f"Ошибка загрузки настроек антиспама: {e}")
 
     async def check_spam(self, message):
         """Проверяет сообщение на спам"""
-        user_id = message.author.id
-        now = datetime.now(timezone.utc).timestamp()
-        
+        policy = self.get_policy(message)
         # Проверка обычного спама
-        spam_history = self.spam_history[user_id]
-        spam_history.append(now)
-        
-        if len(spam_history) == SPAM_THRESHOLD and (now - spam_history[0]) <= SPAM_WINDOW:
+        if self.check_rate(message, "spam", policy):
             await self.handle_spam(message, "обычный спам")
             return True
         
+        # Проверка рейда одинаковыми сообщениями (по всей гильдии, от нескольких аккаунтов)
+        if message.guild and message.content:
+            limit, window = policy.rules["duplicate"]
+            text = self.normalized.get(message.id, message.content)
+            if self.duplicates.check(message.guild.id, text, message.author.id, limit, window,
+                                     risky=self.is_raid_risk(message)):
+                await self.handle_spam(message, "флуд одинаковыми сообщениями")
+                return True
+        
         # Проверка спама упоминаний
         mentions = len(message.mentions) + len(message.role_mentions)
         if mentions > 0:
-            mention_history = self.mention_spam_history[user_id]
-            mention_history.append(now)
-            
-            if len(mention_history) == MENTION_SPAM_THRESHOLD and (now - mention_history[0]) <= MENTION_SPAM_WINDOW:
+            if self.check_rate(message, "mention", policy):
                 await self.handle_spam(message, "спам упоминаниями")
                 return True
         
-        # Проверка спама эмодзи
-        emoji_chars = '😀😃😄😁😆😅😂🤣😊😇🙂🙃😉😌😍🥰😘😗😙😚😋😛😝😜🤪🤨🧐🤓😎🤩🥳😏😒😞😔😟😕🙁☹️😣😖😫😩🥺😢😭😤😠😡🤬🤯😳🥵🥶😱😨😰😥😓🤗🤔🤭🤫🤥😶😐😑😯😦😧😮😲🥱😴🤤😪😵🤐🥴🤢🤮🤧😷🤒🤕🤑🤠💀👻👽👾🤖😺😸😹😻😼😽🙀😿😾'
-        emoji_count = len([c for c in message.content if c in emoji_chars])
-        if emoji_count > 5:
-            emoji_history = self.emoji_spam_history[user_id]
-            emoji_history.append(now)
-            
-            if len(emoji_history) == EMOJI_SPAM_THRESHOLD and (now - emoji_history[0]) <= EMOJI_SPAM_WINDOW:
+        # Проверка спама эмодзи (Unicode и кастомные <:name:id>, за один проход)
+        emoji_count = count_emoji(message.content, limit=EMOJI_PER_MESSAGE + 1)
+        if emoji_count > EMOJI_PER_MESSAGE:
+            if self.check_rate(message, "emoji", policy):
                 await self.handle_spam(message, "спам эмодзи")
                 return True
         
@@ -195,22 +352,14 @@ class AntiSpamCog(commands.Cog):
 
     async def check_bot_webhook_spam(self, message):
         """Проверяет спам от ботов и вебхуков"""
-        user_id = message.author.id
-        now = datetime.now(timezone.utc).timestamp()
-        
         # Для вебхуков - мгновенная реакция на любое сообщение
         if message.webhook_id:
             # Сразу удаляем вебхук при первом же сообщении
             await self.handle_webhook_spam(message)
             return True
         
-        # Для ботов - используем историю
-        bot_spam_history = self.spam_history.get(f"bot_{user_id}", deque(maxlen=3))
-        self.spam_history[f"bot_{user_id}"] = bot_spam_history
-        bot_spam_history.append(now)
-        
         # Более строгие правила для ботов: 3 сообщения за 5 секунд
-        if len(bot_spam_history) == 3 and (now - bot_spam_history[0]) <= 5:
+        if self.check_rate(message, "bot", self.get_policy(message)):
             # Добавляем небольшую задержку, чтобы избежать rate limit
             await asyncio.sleep(0.5)
             await self.handle_bot_spam(message)
@@ -226,15 +375,11 @@ class AntiSpamCog(commands.Cog):
         if webhook_id in self.processed_webhooks:
             return
         
-        # Проверяем белый список ботов
-        try:
-            webhook_obj = await self.bot.fetch_webhook(webhook_id)
-            if webhook_obj.user and webhook_obj.user.id in self.whitelisted_bots:
-                logger.info(f"[AntiSpam] Вебхук {webhook_id} от белого списка бота {webhook_obj.user.name}, пропускаем")
-                return
-        except Exception as e:
-            logger.debug(f"Не удалось проверить владельца вебхука {webhook_id}: {e}")
-            # Продолжаем обработку, если не можем проверить
+        # Проверяем белый список ботов (владелец из кэша, REST только для неизвестного вебхука)
+        info = await self.webhook_cache.resolve(self.bot, webhook_id)
+        if info is not None and self.webhook_cache.is_whitelisted(webhook_id):
+            logger.info(f"[AntiSpam] Вебхук {webhook_id} от белого списка бота {info.owner_id}, пропускаем")
+            return
         
         try:
             # Удаляем сообщение (если оно ещё существует)
@@ -246,13 +391,17 @@ class AntiSpamCog(commands.Cog):
                 logger.warning(f"[AntiSpam] Нет прав на удаление сообщения от вебхука {webhook_id}")
             
             # Удаляем вебхук
-            if webhook_id:
+            if info is None:
+                logger.info(f"[AntiSpam] Вебхук {webhook_id} не найден или нет прав на управление вебхуками")
+            else:
                 try:
-                    webhook_obj = await self.bot.fetch_webhook(webhook_id)
-                    await webhook_obj.delete(reason="Антиспам: удаление спам-вебхука")
-                    logger.info(f"[AntiSpam] Удалён вебхук {webhook_id} за спам")
+                    await info.webhook.delete(reason="Антиспам: удаление спам-вебхука")
+                    logger.info(f"[AntiSpam] Удалён вебхук {webhook_id} за спам",
+                                extra={"guild_id": info.guild_id, "user_id": info.owner_id, "action": "webhook_delete"})
+                    self.webhook_cache.remove(webhook_id)
                 except discord.NotFound:
                     logger.info(f"[AntiSpam] Вебхук {webhook_id} уже удалён")
+                    self.webhook_cache.remove(webhook_id)
                 except Exception as e:
                     logger.error(f"Ошибка удаления вебхука {webhook_id}: {e}")
             
@@ -260,7 +409,7 @@ class AntiSpamCog(commands.Cog):
             self.processed_webhooks.add(webhook_id)
             
             # Уведомление (только один раз с кулдауном)
-            if self.can_send_notification("webhook_spam"):
+            if self.can_send_notification("webhook_spam", message.guild.id if message.guild else None):
                 admin_role_id = getattr(config, 'ADMIN_ALERT_ROLE_ID', None) or (getattr(config, 'TRUSTED_ROLE_IDS', None) or [None])[0]
                 admin_ping = f'<@&{admin_role_id}>' if admin_role_id else None
                 allowed_mentions = discord.AllowedMentions(roles=True)
@@ -275,14 +424,7 @@ class AntiSpamCog(commands.Cog):
                 # Отправляем в канал текущей гильдии
                 guild = message.guild
                 if guild:
-                    target_channel = guild.get_channel(getattr(config, 'ATTACK_ALERT_CHANNEL_ID', None)) or guild.get_channel(getattr(config, 'LOG_CHANNEL_ID', None))
-                    if not target_channel:
-                        for ch in guild.text_channels:
-                            if ch.name.lower() in ['mod-logs', 'moderation-logs', 'logs', 'modlogs', 'audit-logs'] and ch.permissions_for(guild.me).send_messages:
-                                target_channel = ch
-                                break
-                    if not target_channel and guild.system_channel and guild.system_channel.permissions_for(guild.me).send_messages:
-                        target_channel = guild.system_channel
+                    target_channel = alert_channel_resolver.resolve(guild)
                     if target_channel:
                         if admin_ping:
                             await target_channel.send(admin_ping, allowed_mentions=allowed_mentions)
@@ -290,24 +432,17 @@ class AntiSpamCog(commands.Cog):
             
         except Exception as e:
             logger.error(f"Ошибка обработки спама вебхука {webhook_id}: {e}")
-        
-        # Очищаем старые записи через минуту
-        asyncio.create_task(self.cleanup_processed_webhooks())
-
-    async def cleanup_processed_webhooks(self):
-        """Очищает старые записи обработанных вебхуков"""
-        await asyncio.sleep(self.webhook_cooldown)
-        self.processed_webhooks.clear()
     
-    def can_send_notification(self, notification_type):
-        """Проверяет, можно ли отправить уведомление"""
+    def can_send_notification(self, notification_type, guild_id=None):
+        """Проверяет, можно ли отправить уведомление (кулдаун отдельный для каждой гильдии)"""
         now = datetime.now(timezone.utc).timestamp()
-        last_notification = self.notification_cooldown.get(notification_type, 0)
+        key = (guild_id, notification_type)
+        last_notification = self.notification_cooldown.get(key, 0)
         
         if now - last_notification < self.notification_delay:
             return False
         
-        self.notification_cooldown[notification_type] = now
+        self.notification_cooldown[key] = now
         return True
 
     async def handle_bot_spam(self, message):
@@ -315,7 +450,7 @@ class AntiSpamCog(commands.Cog):
         bot_id = message.author.id
         
         # Проверяем, не обрабатывали ли мы уже этого бота
-        if bot_id in self.processed_webhooks:  # Используем тот же механизм
+        if bot_id in self.processed_bots:
             return
         
         try:
@@ -345,10 +480,10 @@ class AntiSpamCog(commands.Cog):
                 action = "ошибка наказания"
             
             # Добавляем бота в обработанные
-            self.processed_webhooks.add(bot_id)
+            self.processed_bots.add(bot_id)
             
             # Уведомление (только один раз с кулдауном)
-            if self.can_send_notification("bot_spam"):
+            if self.can_send_notification("bot_spam", message.guild.id if message.guild else None):
                 admin_role_id = getattr(config, 'ADMIN_ALERT_ROLE_ID', None) or (getattr(config, 'TRUSTED_ROLE_IDS', None) or [None])[0]
                 admin_ping = f'<@&{admin_role_id}>' if admin_role_id else None
                 allowed_mentions = discord.AllowedMentions(roles=True)
@@ -363,78 +498,164 @@ class AntiSpamCog(commands.Cog):
                 
                 guild = message.guild
                 if guild:
-                    target_channel = guild.get_channel(getattr(config, 'ATTACK_ALERT_CHANNEL_ID', None)) or guild.get_channel(getattr(config, 'LOG_CHANNEL_ID', None))
-                    if not target_channel:
-                        for ch in guild.text_channels:
-                            if ch.name.lower() in ['mod-logs', 'moderation-logs', 'logs', 'modlogs', 'audit-logs'] and ch.permissions_for(guild.me).send_messages:
-                                target_channel = ch
-                                break
-                    if not target_channel and guild.system_channel and guild.system_channel.permissions_for(guild.me).send_messages:
-                        target_channel = guild.system_channel
+                    target_channel = alert_channel_resolver.resolve(guild)
                     if target_channel:
                         if admin_ping:
                             await target_channel.send(admin_ping, allowed_mentions=allowed_mentions)
                         await target_channel.send(embed=embed)
             
-            logger.info(f"[AntiSpam] Бот {message.author} {action} за спам")
+            logger.info(f"[AntiSpam] Бот {message.author} {action} за спам",
+                        extra={"guild_id": message.guild.id, "user_id": bot_id, "action": "bot_punish"})
             
         except Exception as e:
             logger.error(f"Ошибка обработки спама бота {bot_id}: {e}")
 
     async def handle_spam(self, message, spam_type):
-        """Обрабатывает обнаруженный спам"""
+        """Обрабатывает обнаруженный спам: сначала мут, затем удаление недавних сообщений
+        спамера (уведомление уходит сводным сообщением канала, не дожидаясь REST)"""
+        guild_id = message.guild.id if message.guild else 0
+        key = (guild_id, message.author.id)
+        if key in self.enforcing:
+            # Сообщения, пришедшие до того, как мут применился: только удаляем
+            await self.delete_spam_message(message)
+            return
+        self.enforcing.add(key)
+        
+        # Мут в первую очередь: каждая задержка - лишние сообщения спамера
         try:
-            # Удаляем сообщение
-            await message.delete()
-            
-            # Временный мут на 5 минут
-            duration = timedelta(minutes=5)
-            until = datetime.now(timezone.utc) + duration
-            
-            try:
-                await message.author.timeout(until, reason=f"Антиспам: {spam_type}")
-            except discord.Forbidden:
+            until = datetime.now(timezone.utc) + SPAM_TIMEOUT
+            await message.author.timeout(until, reason=f"Антиспам: {spam_type}")
+            self.timeout_latency.record((datetime.now(timezone.utc) - message.created_at).total_seconds())
+            logger.info(f"[AntiSpam] {message.author} получил мут за {spam_type}",
+                        extra={"guild_id": guild_id, "user_id": message.author.id, "action": "timeout"})
+        except discord.HTTPException as e:
+            # Запрос дошёл до Discord, но мут не выдан: в уведомление не попадает
+            self.rest_spend.spend(guild_id, "timeout")
+            if isinstance(e, discord.Forbidden):
                 logger.warning(f"Нет прав на мут пользователя {message.author}")
-            
-            # Уведомление
-            embed = discord.Embed(
-                title="🚫 Антиспам",
-                description=f"**Пользователь:** {message.author.mention}\n**Тип:** {spam_type}\n**Длительность:** 5 минут",
-                color=discord.Color.red(),
-                timestamp=datetime.now()
-            )
-            embed.set_footer(text=f"ID: {message.author.id}")
-            
-            await message.channel.send(embed=embed, delete_after=10)
-            
-            # Логирование
-            logger.info(f"[AntiSpam] {message.author} получил мут за {spam_type}")
-            
-        except discord.Forbidden:
-            logger.warning("Нет прав на удаление сообщения")
+            else:
+                logger.error(f"Ошибка обработки спама: {e}")
         except Exception as e:
             logger.error(f"Ошибка обработки спама: {e}")
+        else:
+            self.rest_spend.spend(guild_id, "timeout")
+            self.spam_notifier.add(message.channel.id, message.channel, (message.author, spam_type))
+        
+        if message.guild:
+            await self.purge_spammer_messages(message)
+        else:
+            await self.delete_spam_message(message)
+
+    async def purge_spammer_messages(self, message):
+        """Удаляет сообщения автора за SPAM_PURGE_WINDOW секунд во всех каналах гильдии:
+        один запрос bulk delete на канал (до 100 сообщений) вместо запроса на сообщение"""
+        guild = message.guild
+        since = message.created_at.timestamp() - SPAM_PURGE_WINDOW
+        by_channel = self.recent_messages.take(guild.id, message.author.id, since)
+        ids = by_channel.setdefault(message.channel.id, [])
+        if message.id not in ids:
+            ids.append(message.id)
+        
+        requests = []
+        for channel_id, message_ids in by_channel.items():
+            channel = message.channel if channel_id == message.channel.id else guild.get_channel_or_thread(channel_id)
+            message_ids = [m for m in message_ids if m not in self.deleted_messages]
+            if channel is None or not message_ids:
+                continue
+            for i in range(0, len(message_ids), BULK_DELETE_LIMIT):
+                requests.append(self.bulk_delete(channel, message_ids[i:i + BULK_DELETE_LIMIT]))
+        await asyncio.gather(*requests)
+
+    async def bulk_delete(self, channel, message_ids):
+        """Удаляет до 100 сообщений канала одним запросом (одно сообщение - обычным удалением)"""
+        route = "bulk_delete" if len(message_ids) > 1 else "delete"
+        try:
+            await channel.delete_messages([discord.Object(id=m) for m in message_ids])
+        except discord.HTTPException as e:
+            self.rest_spend.spend(channel.guild.id, route)
+            if isinstance(e, discord.Forbidden):
+                logger.warning(f"Нет прав на удаление сообщений в канале {channel}")
+            elif not isinstance(e, discord.NotFound):
+                logger.error(f"Ошибка массового удаления сообщений: {e}")
+        except Exception as e:
+            logger.error(f"Ошибка массового удаления сообщений: {e}")
+        else:
+            self.rest_spend.spend(channel.guild.id, route)
 
-    async def check_nuke_actions(self, user_id, action_type):
+    async def delete_spam_message(self, message):
+        """Удаляет сообщение спамера (уже удалённое пропускается)"""
+        if message.id in self.deleted_messages:
+            return
+        guild_id = message.guild.id if message.guild else 0
+        try:
+            await message.delete()
+        except discord.HTTPException as e:
+            self.rest_spend.spend(guild_id, "delete")
+            if isinstance(e, discord.Forbidden):
+                logger.warning("Нет прав на удаление сообщения")
+            elif not isinstance(e, discord.NotFound):
+                logger.error(f"Ошибка удаления сообщения: {e}")
+        except Exception as e:
+            logger.error(f"Ошибка удаления сообщения: {e}")
+        else:
+            self.rest_spend.spend(guild_id, "delete")
+
+    async def send_spam_notification(self, channel, items):
+        """Одно уведомление на все муты в канале за SPAM_NOTIFY_DELAY секунд"""
+        users = {}
+        for member, spam_type in items:
+            users.setdefault(member.id, (member, spam_type))
+        duration = f"{int(SPAM_TIMEOUT.total_seconds() // 60)} минут"
+        
+        if len(users) == 1:
+            member, spam_type = next(iter(users.values()))
+            description = f"**Пользователь:** {member.mention}\n**Тип:** {spam_type}\n**Длительность:** {duration}"
+            footer = f"ID: {member.id}"
+        else:
+            lines = [f"{member.mention} - {spam_type}" for member, spam_type in list(users.values())[:SPAM_NOTIFY_MAX_USERS]]
+            if len(users) > SPAM_NOTIFY_MAX_USERS:
+                lines.append(f"… и ещё {len(users) - SPAM_NOTIFY_MAX_USERS}")
+            description = f"**Замьючено пользователей:** {len(users)}\n**Длительность:** {duration}\n\n" + "\n".join(lines)
+            footer = f"Канал: {channel.name}"
+        
+        embed = discord.Embed(
+            title="🚫 Антиспам",
+            description=description,
+            color=discord.Color.red(),
+            timestamp=datetime.now()
+        )
+        embed.set_footer(text=footer)
+        
+        await channel.send(embed=embed, delete_after=10)
+        guild = getattr(channel, "guild", None)
+        self.rest_spend.spend(guild.id if guild else 0, "notify")
+
+    async def check_nuke_actions(self, guild, user_id, action_type):
         """Проверяет действия на подозрительную активность (анти-nuke)"""
         now = datetime.now(timezone.utc).timestamp()
-        nuke_history = self.nuke_history[user_id]
+        # Состояние ведётся по гильдии: при шардинге гильдии разных шардов не пересекаются
+        key = (guild.id, user_id)
+        policy = self.policies.get(guild.id)
+        nuke_history = self.nuke_history[key]
+        if nuke_history.maxlen != policy.nuke_threshold:
+            # Порог гильдии изменился - история перестраивается с новым размером
+            nuke_history = self.nuke_history[key] = deque(nuke_history, maxlen=policy.nuke_threshold)
         nuke_history.append((now, action_type))
         
         # Проверяем количество действий за окно времени
-        recent_actions = [action for timestamp, action in nuke_history if (now - timestamp) <= NUKE_ACTION_WINDOW]
+        recent_actions = [action for timestamp, action in nuke_history if (now - timestamp) <= policy.nuke_window]
         
         if len(recent_actions) >= NUKE_ALERT_THRESHOLD:
-            if user_id not in self.nuke_alerts:
-                await self.send_nuke_alert(user_id, recent_actions)
-                self.nuke_alerts.add(user_id)
+            if key not in self.nuke_alerts:
+                await self.send_nuke_alert(guild, user_id, recent_actions)
+                self.nuke_alerts.add(key)
                 # Сброс алерта через 5 минут
-                asyncio.create_task(self.reset_nuke_alert(user_id))
+                asyncio.create_task(self.reset_nuke_alert(key))
 
-    async def send_nuke_alert(self, user_id, actions):
+    async def send_nuke_alert(self, guild, user_id, actions):
         """Отправляет алерт о подозрительной активности"""
         try:
-            user = self.bot.get_user(user_id)
+            user = guild.get_member(user_id) or self.bot.get_user(user_id)
             if not user:
                 return
             
@@ -452,36 +673,25 @@ class AntiSpamCog(commands.Cog):
             embed.set_footer(text="AntiNuke Protection")
             
             # Отправляем в канал алертов с пингом (с кулдауном)
-            if self.can_send_notification("nuke_alert"):
+            if self.can_send_notification("nuke_alert", guild.id):
                 admin_role_id = getattr(config, 'ADMIN_ALERT_ROLE_ID', None) or (getattr(config, 'TRUSTED_ROLE_IDS', None) or [None])[0]
                 admin_ping = f'<@&{admin_role_id}>' if admin_role_id else None
                 allowed_mentions = discord.AllowedMentions(roles=True)
                 
-                # Ищем гильдию, где есть этот пользователь
-                for guild in self.bot.guilds:
-                    member = guild.get_member(user_id)
-                    if member:
-                        target_channel = guild.get_channel(getattr(config, 'ATTACK_ALERT_CHANNEL_ID', None)) or guild.get_channel(getattr(config, 'LOG_CHANNEL_ID', None))
-                        if not target_channel:
-                            for ch in guild.text_channels:
-                                if ch.name.lower() in ['mod-logs', 'moderation-logs', 'logs', 'modlogs', 'audit-logs'] and ch.permissions_for(guild.me).send_messages:
-                                    target_channel = ch
-                                    break
-                        if not target_channel and guild.system_channel and guild.system_channel.permissions_for(guild.me).send_messages:
-                            target_channel = guild.system_channel
-                        if target_channel:
-                            if admin_ping:
-                                await target_channel.send(admin_ping, allowed_mentions=allowed_mentions)
-                            await target_channel.send(embed=embed)
-                            break
+                # Алерт уходит в гильдию, где произошли действия
+                target_channel = alert_channel_resolver.resolve(guild)
+                if target_channel:
+                    if admin_ping:
+                        await target_channel.send(admin_ping, allowed_mentions=allowed_mentions)
+                    await target_channel.send(embed=embed)
                         
         except Exception as e:
             logger.error(f"Ошибка отправки nuke алерта: {e}")
 
-    async def reset_nuke_alert(self, user_id):
+    async def reset_nuke_alert(self, key):
         """Сбрасывает алерт nuke через 5 минут"""
         await asyncio.sleep(300)  # 5 минут
-        self.nuke_alerts.discard(user_id)
+        self.nuke_alerts.discard(key)
 
     @commands.Cog.listener()
     async def on_message(self, message):
@@ -489,45 +699,54 @@ class AntiSpamCog(commands.Cog):
         if message.author == self.bot.user:
             return
         
-        # Проверяем, что сообщение ещё существует
-        try:
-            # Проверяем доступность сообщения
-            await message.channel.fetch_message(message.id)
-        except discord.NotFound:
+        # Проверяем, что сообщение ещё существует (по событиям удаления, без REST)
+        if message.id in self.deleted_messages:
             logger.info(f"[AntiSpam] Сообщение {message.id} уже удалено, пропускаем")
             return
-        except Exception:
-            # Если не можем проверить, продолжаем обработку
-            pass
+        self.fetch_calls_saved += 1
         
-        # Проверка запрещённых слов
-        content = message.content.lower()
-        for word in BLOCKED_WORDS:
-            if word in content:
-                try:
-                    await message.delete()
-                    
-                    # Если это вебхук - удаляем его
-                    if message.webhook_id:
-                        await self.handle_webhook_spam(message)
-                        return
-                    # Если это бот - баним/кикаем
-                    elif message.author.bot:
-                        await self.handle_bot_spam(message)
-                        return
-                    # Обычный пользователь
-                    else:
-                        await message.channel.send(
-                            f"❌ {message.author.mention}, ваше сообщение было удалено (запрещённое слово)",
-                            delete_after=5
-                        )
-                    
-                    logger.info(f"[AntiSpam] Удалено сообщение от {message.author}: {message.content}")
-                except discord.Forbidden:
-                    logger.warning("[AntiSpam] Нет прав на удаление сообщений.")
-                except Exception as e:
-                    logger.error(f"[AntiSpam] Ошибка: {e}")
-                return
+        # Запоминаем сообщение: при муте автора его недавние сообщения удаляются пачкой
+        if message.guild and not message.author.bot:
+            self.recent_messages.add(
+                message.guild.id, message.channel.id, message.id, message.author.id,
+                message.created_at.timestamp()
+            )
+        
+        # Проверка запрещённых слов (по приведённому тексту: гомоглифы, полноширинные символы, разрядка)
+        content = self.normalized.get(message.id, message.content)
+        if blocked_words.search(content) is not None:
+            try:
+                await message.delete()
+                
+                # Если это вебхук - удаляем его
+                if message.webhook_id:
+                    await self.handle_webhook_spam(message)
+                    return
+                # Если это бот - баним/кикаем
+                elif message.author.bot:
+                    await self.handle_bot_spam(message)
+                    return
+                # Обычный пользователь
+                else:
+                    await message.channel.send(
+                        f"❌ {message.author.mention}, ваше сообщение было удалено (запрещённое слово)",
+                        delete_after=5
+                    )
+                
+                logger.info(
+                    f"[AntiSpam] Удалено сообщение от {message.author}: {message.content}",
+                    extra={"guild_id": message.guild.id if message.guild else None,
+                           "user_id": message.author.id, "action": "blocked_word"}
+                )
+            except discord.Forbidden:
+                logger.warning("[AntiSpam] Нет прав на удаление сообщений.")
+            except Exception as e:
+                logger.error(f"[AntiSpam] Ошибка: {e}")
+            return
+        
+        # Вебхуки из белого списка дальше не проверяем (по кэшу, без REST)
+        if message.webhook_id and self.webhook_cache.is_whitelisted(message.webhook_id):
+            return
         
         # Проверка спама только для обычных пользователей
         if not message.author.bot and not message.webhook_id:
@@ -539,46 +758,164 @@ class AntiSpamCog(commands.Cog):
         elif message.webhook_id:
             await self.handle_webhook_spam(message)
 
+    @commands.Cog.listener()
+    async def on_raw_message_delete(self, payload):
+        """Запоминает удалённые сообщения (срабатывает и для некэшированных)"""
+        self.deleted_messages.add(payload.message_id)
+
+    @commands.Cog.listener()
+    async def on_raw_bulk_message_delete(self, payload):
+        """Запоминает сообщения, удалённые массово"""
+        for message_id in payload.message_ids:
+            self.deleted_messages.add(message_id)
+
+    async def track_audit_action(self, guild, action, target_id, action_type):
+        """Находит автора действия по ID цели в кэше журнала аудита и учитывает его в анти-nuke"""
+        try:
+            entry = await self.audit_log.find(guild, action, target_id)
+        except Exception as e:
+            logger.error(f"Ошибка чтения журнала аудита: {e}")
+            return
+        if entry is not None:
+            await self.count_audit_entry(guild, entry, action_type)
+
+    async def count_audit_entry(self, guild, entry, action_type):
+        """Учитывает запись журнала в анти-nuke; после неё каждый выход проверяется до конца окна"""
+        if entry.user is None or entry.user.id == self.bot.user.id:
+            return
+        # Одна запись журнала учитывается только один раз
+        if not self.audit_log.claim(entry):
+            return
+        await self.check_nuke_actions(guild, entry.user.id, action_type)
+        if self.kick_watch.get(guild.id, 0) <= time.monotonic():
+            await self.watch_kicks(guild)
+
+    async def watch_kicks(self, guild):
+        """Открывает окно анти-nuke, в котором каждый выход ищется в журнале аудита,
+        и проверяет накопленные выходы одной выборкой журнала"""
+        policy = self.policies.get(guild.id)
+        if policy.nuke_threshold <= 0 or not guild.me.guild_permissions.view_audit_log:
+            return
+        self.kick_watch[guild.id] = time.monotonic() + policy.nuke_window
+        leaves = self.member_leaves.pop(guild.id) or ()
+        await asyncio.gather(*(
+            self.track_audit_action(guild, discord.AuditLogAction.kick, member_id, "kick")
+            for _, member_id in leaves
+        ))
+
     @commands.Cog.listener()
     async def on_member_ban(self, guild, user):
         """Отслеживает баны"""
-        async for entry in guild.audit_logs(action=discord.AuditLogAction.ban, limit=1):
-            if entry.user.id != self.bot.user.id:
-                await self.check_nuke_actions(entry.user.id, "ban")
+        await self.track_audit_action(guild, discord.AuditLogAction.ban, user.id, "ban")
 
     @commands.Cog.listener()
     async def on_member_remove(self, member):
-        """Отслеживает кики"""
-        async for entry in member.guild.audit_logs(action=discord.AuditLogAction.kick, limit=1):
-            if entry.user.id != self.bot.user.id:
-                await self.check_nuke_actions(entry.user.id, "kick")
+        """Отслеживает кики. Одиночный выход ищется только в кэше журнала аудита; запрос журнала
+        начинается, когда выходов в окне набирается на порог алерта или после другого действия модератора"""
+        guild = member.guild
+        policy = self.policies.get(guild.id)
+        if policy.nuke_threshold <= 0 or not guild.me.guild_permissions.view_audit_log:
+            return
+        now = time.monotonic()
+        if self.kick_watch.get(guild.id, 0) > now:
+            self.kick_watch[guild.id] = now + policy.nuke_window
+            await self.track_audit_action(guild, discord.AuditLogAction.kick, member.id, "kick")
+            return
+        # Журнал мог быть загружен недавней выборкой (баны, удаления каналов) - без запроса
+        entry = self.audit_log.cached(guild.id, discord.AuditLogAction.kick, member.id)
+        if entry is not None:
+            await self.count_audit_entry(guild, entry, "kick")
+            return
+        
+        leaves = self.member_leaves[guild.id]
+        leaves.append((now, member.id))
+        while leaves and now - leaves[0][0] > policy.nuke_window:
+            leaves.popleft()
+        # Порог не выше порога алерта: всплеск, достойный алерта, всегда попадает в проверку
+        if len(leaves) < min(policy.nuke_threshold, NUKE_ALERT_THRESHOLD):
+            return
+        # Всплеск выходов: все проверяются по одной выборке журнала, следующие - сразу
+        await self.watch_kicks(guild)
+
+    # Кэш каналов для алертов сбрасывается при изменении каналов, ролей и прав бота
+    @commands.Cog.listener()
+    async def on_guild_channel_create(self, channel):
+        alert_channel_resolver.invalidate(channel.guild.id)
+
+    @commands.Cog.listener()
+    async def on_guild_channel_update(self, before, after):
+        alert_channel_resolver.invalidate(after.guild.id)
+
+    @commands.Cog.listener()
+    async def on_guild_role_update(self, before, after):
+        alert_channel_resolver.invalidate(after.guild.id)
+
+    @commands.Cog.listener()
+    async def on_guild_update(self, before, after):
+        if before.system_channel != after.system_channel:
+            alert_channel_resolver.invalidate(after.id)
+
+    @commands.Cog.listener()
+    async def on_member_update(self, before, after):
+        if after.id == self.bot.user.id and before.roles != after.roles:
+            alert_channel_resolver.invalidate(after.guild.id)
 
     @commands.Cog.listener()
     async def on_guild_channel_delete(self, channel):
         """Отслеживает удаление каналов"""
-        async for entry in channel.guild.audit_logs(action=discord.AuditLogAction.channel_delete, limit=1):
-            if entry.user.id != self.bot.user.id:
-                await self.check_nuke_actions(entry.user.id, "channel_delete")
+        alert_channel_resolver.invalidate(channel.guild.id)
+        await self.track_audit_action(channel.guild, discord.AuditLogAction.channel_delete, channel.id, "channel_delete")
 
     @commands.Cog.listener()
     async def on_guild_role_delete(self, role):
         """Отслеживает удаление ролей"""
-        async for entry in role.guild.audit_logs(action=discord.AuditLogAction.role_delete, limit=1):
-            if entry.user.id != self.bot.user.id:
-                await self.check_nuke_actions(entry.user.id, "role_delete")
+        alert_channel_resolver.invalidate(role.guild.id)
+        await self.track_audit_action(role.guild, discord.AuditLogAction.role_delete, role.id, "role_delete")
 
     @commands.Cog.listener()
     async def on_guild_emojis_update(self, guild, before, after):
         """Отслеживает удаление эмодзи"""
-        if len(before) > len(after):
-            async for entry in guild.audit_logs(action=discord.AuditLogAction.emoji_delete, limit=1):
-                if entry.user.id != self.bot.user.id:
-                    await self.check_nuke_actions(entry.user.id, "emoji_delete")
+        remaining = {emoji.id for emoji in after}
+        deleted = [emoji for emoji in before if emoji.id not in remaining]
+        if deleted:
+            await asyncio.gather(*(
+                self.track_audit_action(guild, discord.AuditLogAction.emoji_delete, emoji.id, "emoji_delete")
+                for emoji in deleted
+            ))
+
+    @commands.Cog.listener()
+    async def on_ready(self):
+        # Вебхуки всех гильдий (уже загруженные при переподключении пропускаются)
+        await self.webhook_cache.preload_all(self.bot.guilds)
+        logger.info(f"[AntiSpam] Вебхуков в кэше: {len(self.webhook_cache)}")
+
+    @commands.Cog.listener()
+    async def on_guild_join(self, guild):
+        await self.webhook_cache.preload(guild)
+
+    @commands.Cog.listener()
+    async def on_webhooks_update(self, channel):
+        """Вебхук канала создан, изменён или удалён: перечитываем вебхуки канала"""
+        await self.webhook_cache.refresh_channel(channel)
+
+    @commands.Cog.listener()
+    async def on_guild_remove(self, guild):
+        self.audit_log.forget(guild.id)
+        self.member_leaves.pop(guild.id)
+        self.kick_watch.pop(guild.id)
+        self.policies.forget(guild.id)
+        self.duplicates.forget(guild.id)
+        self.rest_spend.forget(guild.id)
+        self.recent_messages.forget(guild.id)
+        self.webhook_cache.forget(guild.id)
+        alert_channel_resolver.invalidate(guild.id)
 
     # Команды управления антиспамом
     @commands.command(name="antispam", help="Настройки антиспама")
     async def antispam_settings(self, ctx):
         """Показывает текущие настройки антиспама"""
+        guild_id = ctx.guild.id if ctx.guild else None
+        settings = {name: config_manager.get(guild_id, name) for name in SPAM_SETTINGS}
         embed = discord.Embed(
             title="⚙️ Настройки антиспама",
             color=discord.Color.blue()
@@ -586,61 +923,126 @@ class AntiSpamCog(commands.Cog):
         
         embed.add_field(
             name="📝 Обычный спам",
-            value=f"**Порог:** {SPAM_THRESHOLD} сообщений\n**Окно:** {SPAM_WINDOW} сек",
+            value=f"**Порог:** {settings['spam_threshold']} сообщений\n**Окно:** {settings['spam_window']} сек",
             inline=True
         )
         embed.add_field(
             name="📢 Спам упоминаниями",
-            value=f"**Порог:** {MENTION_SPAM_THRESHOLD} упоминаний\n**Окно:** {MENTION_SPAM_WINDOW} сек",
+            value=f"**Порог:** {settings['mention_threshold']} упоминаний\n**Окно:** {settings['mention_window']} сек",
             inline=True
         )
         embed.add_field(
             name="😀 Спам эмодзи",
-            value=f"**Порог:** {EMOJI_SPAM_THRESHOLD} эмодзи\n**Окно:** {EMOJI_SPAM_WINDOW} сек",
+            value=f"**Порог:** {settings['emoji_threshold']} эмодзи\n**Окно:** {settings['emoji_window']} сек",
+            inline=True
+        )
+        embed.add_field(
+            name="♻️ Одинаковые сообщения",
+            value=f"**Порог:** {settings['duplicate_threshold']} сообщений от {DUPLICATE_MIN_AUTHORS}+ аккаунтов\n**Окно:** {settings['duplicate_window']} сек\n**Учитываются:** ссылки, упоминания, новые аккаунты",
             inline=True
         )
         embed.add_field(
             name="🛡️ Анти-nuke",
-            value=f"**Порог:** {NUKE_ACTION_THRESHOLD} действий\n**Окно:** {NUKE_ACTION_WINDOW} сек",
+            value=f"**Порог:** {settings['nuke_threshold']} действий\n**Окно:** {settings['nuke_window']} сек",
             inline=True
         )
+        embed.set_footer(text=f"Сэкономлено REST-запросов fetch_message: {self.fetch_calls_saved}")
         
         await ctx.send(embed=embed)
 
-    @commands.command(name="setspam", help="Изменить настройки антиспама")
+    @commands.command(name="setspam", help="Изменить настройки антиспама этого сервера")
     async def set_spam_settings(self, ctx, setting: str, value: int):
         """Изменяет настройки антиспама"""
         if not ctx.author.guild_permissions.administrator:
             await ctx.send("❌ У вас нет прав администратора!")
             return
         
-        global SPAM_THRESHOLD, SPAM_WINDOW, MENTION_SPAM_THRESHOLD, MENTION_SPAM_WINDOW
-        global EMOJI_SPAM_THRESHOLD, EMOJI_SPAM_WINDOW, NUKE_ACTION_THRESHOLD, NUKE_ACTION_WINDOW
-        
         setting = setting.lower()
-        if setting == "spam_threshold":
-            SPAM_THRESHOLD = value
-        elif setting == "spam_window":
-            SPAM_WINDOW = value
-        elif setting == "mention_threshold":
-            MENTION_SPAM_THRESHOLD = value
-        elif setting == "mention_window":
-            MENTION_SPAM_WINDOW = value
-        elif setting == "emoji_threshold":
-            EMOJI_SPAM_THRESHOLD = value
-        elif setting == "emoji_window":
-            EMOJI_SPAM_WINDOW = value
-        elif setting == "nuke_threshold":
-            NUKE_ACTION_THRESHOLD = value
-        elif setting == "nuke_window":
-            NUKE_ACTION_WINDOW = value
-        else:
+        if setting not in SPAM_SETTINGS:
             await ctx.send("❌ Неизвестная настройка!")
             return
+        if value < 0:
+            await ctx.send("❌ Значение не может быть отрицательным!")
+            return
         
-        self.save_settings()
+        # Только для этой гильдии, сохраняется в фоне (bot_config.json)
+        config_manager.set(ctx.guild.id, **{setting: value})
         await ctx.send(f"✅ Настройка `{setting}` изменена на `{value}`")
 
+    @commands.command(name="setchannel", help="Канал для алертов или логов: setchannel <alert|log> [#канал]")
+    async def set_channel(self, ctx, kind: str, channel: discord.TextChannel = None):
+        """Задаёт канал алертов/логов гильдии (без канала - сброс к автоматическому выбору)"""
+        if not ctx.author.guild_permissions.administrator:
+            await ctx.send("❌ У вас нет прав администратора!")
+            return
+        
+        kind = kind.lower()
+        if kind not in ("alert", "log"):
+            await ctx.send("❌ Использование: `setchannel <alert|log> [#канал]`")
+            return
+        
+        config_manager.set(ctx.guild.id, **{f"{kind}_channel_id": channel.id if channel else None})
+        alert_channel_resolver.invalidate(ctx.guild.id)
+        if channel:
+            await ctx.send(f"✅ Канал `{kind}`: {channel.mention}")
+        else:
+            await ctx.send(f"✅ Канал `{kind}` сброшен")
+
+    @commands.command(name="memstats", help="Память, занятая состоянием антиспама")
+    async def memory_stats_command(self, ctx):
+        """Показывает размер структур состояния антиспама"""
+        if not ctx.author.guild_permissions.administrator:
+            await ctx.send("❌ У вас нет прав администратора!")
+            return
+        
+        embed = discord.Embed(
+            title="🧠 Память антиспама",
+            color=discord.Color.blue(),
+            timestamp=datetime.now()
+        )
+        total = 0
+        for name, (entries, size) in self.memory_stats().items():
+            total += size
+            embed.add_field(
+                name=name,
+                value=f"**Записей:** {entries}\n**Размер:** ~{size / 1024:.1f} КБ",
+                inline=True
+            )
+        embed.set_footer(text=f"Всего: ~{total / 1024:.1f} КБ")
+        
+        await ctx.send(embed=embed)
+
+    @commands.command(name="spamstats", help="Скорость наказаний и REST-запросы антиспама")
+    async def spam_stats_command(self, ctx):
+        """Задержка от отправки сообщения до мута и REST-запросы гильдии"""
+        if not ctx.author.guild_permissions.administrator:
+            await ctx.send("❌ У вас нет прав администратора!")
+            return
+        
+        embed = discord.Embed(
+            title="⏱️ Статистика наказаний",
+            color=discord.Color.blue(),
+            timestamp=datetime.now()
+        )
+        latency = self.timeout_latency
+        if latency.count:
+            percentiles = "\n".join(
+                f"**p{p}:** ≤ {latency.percentile(p):.0f} мс" for p in (50, 90, 99)
+            )
+            embed.add_field(
+                name="Сообщение → мут",
+                value=f"**Мутов:** {latency.count}\n**Среднее:** {latency.mean:.0f} мс\n{percentiles}\n**Макс.:** {latency.max:.0f} мс",
+                inline=True
+            )
+        else:
+            embed.add_field(name="Сообщение → мут", value="Мутов пока не было", inline=True)
+        
+        spent = self.rest_spend.recent(ctx.guild.id)
+        routes = "\n".join(f"**{route}:** {count}" for route, count in spent.most_common()) or "Нет"
+        embed.add_field(name=f"REST-запросы за {REST_SPEND_WINDOW} с", value=routes, inline=True)
+        
+        await ctx.send(embed=embed)
+
     @commands.command(name="delwebhook", help="Удалить вебхук по ID")
     async def delete_webhook(self, ctx, webhook_id: int):
         """Удаляет вебхук по ID"""
@@ -648,9 +1050,14 @@ class AntiSpamCog(commands.Cog):
             await ctx.send("❌ У вас нет прав администратора!")
             return
         
+        info = await self.webhook_cache.resolve(self.bot, webhook_id)
+        if info is None:
+            await ctx.send("❌ Вебхук не найден!")
+            return
+        
         try:
-            webhook = await self.bot.fetch_webhook(webhook_id)
-            await webhook.delete(reason=f"Удалён администратором {ctx.author}")
+            await info.webhook.delete(reason=f"Удалён администратором {ctx.author}")
+            self.webhook_cache.remove(webhook_id)
             
             embed = discord.Embed(
                 title="🚫 Вебхук удалён",
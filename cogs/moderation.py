@@ -3,13 +3,12 @@ from discord.ext import commands
 from discord.ext.commands import Context
 from discord import Option, SlashCommandOptionType as OptionType
 import logging
-from datetime import datetime, timezone
+from datetime import datetime, timedelta, timezone
 from main import parse_duration, format_duration
-import config
 import asyncio
-import json
 from pathlib import Path
 import os
+import re
 from typing import Optional
 
 # Import language manager
@@ -17,92 +16,101 @@ import sys
 sys.path.append(str(Path(__file__).parent.parent))
 from utils.language_manager import get_text, language_manager
 from utils.config_manager import config_manager
+from utils.mute_store import MuteStore, UNTIL_FORMAT
+from utils.mute_scheduler import MuteScheduler
+from utils.log_writer import BatchedLogWriter
+from utils.alert_channels import alert_channel_resolver
+from utils.blocked_words import blocked_words as blocked_word_list
 
 logger = logging.getLogger(__name__)
 
 BOT_ACTIONS_LOG = Path('bot_actions.log')
-MUTED_USERS_FILE = Path('muted_users.json')
+MUTED_USERS_FILE = Path('muted_users.json')  # Старый формат, импортируется в базу при первом запуске
+MUTED_USERS_DB = Path('muted_users.db')
+
+# Сколько секунд висит подтверждение команды (удаляется в фоне через delete_after)
+CONFIRMATION_LIFETIME = 5
+
+# Действия, у которых есть заголовок moderation.<action>.title в locales
+EMBED_TITLE_ACTIONS = frozenset(('mute', 'timeout', 'ban', 'kick', 'unmute', 'unban', 'voicemute', 'unvoicemute'))
+
+# Массовые действия: одновременно выполняемых запросов и максимум целей за раз.
+# Бакеты rate limit Discord соблюдает HTTP-клиент библиотеки, семафор лишь ограничивает очередь.
+BULK_CONCURRENCY = 5
+BULK_MAX_TARGETS = 500
+# Селектор "зашли за последние N минут": joined:15 / зашли:15
+JOINED_SELECTOR = re.compile(r'^(?:joined|зашли):(\d+)\s*(.*)$', re.IGNORECASE | re.DOTALL)
+
+mute_store = MuteStore(MUTED_USERS_DB, legacy_file=MUTED_USERS_FILE)
+# Сроки мутов в памяти: цикл снятия спит до ближайшего срока
+mute_scheduler = MuteScheduler()
+
+# Запись логов пачками в фоновом потоке, а не open/close в цикле событий
+action_log = BatchedLogWriter(BOT_ACTIONS_LOG)
 
 def log_action_to_file(action: str):
-    with BOT_ACTIONS_LOG.open('a', encoding='utf-8') as f:
-        f.write(f"{datetime.now().strftime('%Y-%m-%d %H:%M:%S')} - {action}\n")
+    action_log.write(f"{datetime.now().strftime('%Y-%m-%d %H:%M:%S')} - {action}")
+
+def _mute_key(user_id, guild_id=None):
+    return (str(guild_id) if guild_id is not None else None, str(user_id))
+
+def _until_timestamp(until: str) -> Optional[float]:
+    try:
+        return datetime.strptime(until, UNTIL_FORMAT).replace(tzinfo=timezone.utc).timestamp()
+    except (TypeError, ValueError):
+        return None
 
 def add_mute_to_file(user_id, username, until, reason, guild_id=None):
-    mutes = []
-    if MUTED_USERS_FILE.exists():
-        with MUTED_USERS_FILE.open(encoding='utf-8') as f:
-            try:
-                mutes = json.load(f)
-            except json.JSONDecodeError:
-                mutes = []
-    
-    mutes = [m for m in mutes if not (
-        m.get('user_id') == str(user_id) and 
-        (guild_id is None or str(m.get('guild_id')) == str(guild_id))
-    )]
-    
-    mutes.append({
-        'user_id': str(user_id),
-        'username': username,
-        'until': until,
-        'reason': reason,
-        'guild_id': str(guild_id) if guild_id is not None else None
-    })
-    
-    with MUTED_USERS_FILE.open('w', encoding='utf-8') as f:
-        json.dump(mutes, f, ensure_ascii=False, indent=2)
+    mute_store.add(user_id, username, until, reason, guild_id=guild_id)
+    deadline = _until_timestamp(until)
+    if deadline is not None:
+        mute_scheduler.schedule(_mute_key(user_id, guild_id), deadline)
 
 def remove_mute_from_file(user_id, guild_id=None):
-    mutes = []
-    if MUTED_USERS_FILE.exists():
-        with MUTED_USERS_FILE.open(encoding='utf-8') as f:
-            try:
-                mutes = json.load(f)
-            except json.JSONDecodeError:
-                mutes = []
-    
-    user_id = str(user_id)
-    guild_id = str(guild_id) if guild_id is not None else None
-    
-    mutes = [
-        m for m in mutes 
-        if not (m.get('user_id') == user_id and 
-               (guild_id is None or str(m.get('guild_id')) == guild_id))
-    ]
-    
-    with MUTED_USERS_FILE.open('w', encoding='utf-8') as f:
-        json.dump(mutes, f, ensure_ascii=False, indent=2)
+    mute_store.remove(user_id, guild_id=guild_id)
+    if guild_id is None:
+        # Без guild_id мут снимается во всех гильдиях
+        for key in [k for k in mute_scheduler.keys() if k[1] == str(user_id)]:
+            mute_scheduler.cancel(key)
+    else:
+        mute_scheduler.cancel(_mute_key(user_id, guild_id))
+
+def serves_guild(bot, guild_id) -> bool:
+    """Обслуживает ли этот процесс гильдию (при --processes у каждого свой диапазон шардов).
+
+    Муты без guild_id (старый формат) достаются процессу с шардом 0.
+    """
+    shard_count = getattr(bot, 'shard_count', None)
+    shard_ids = getattr(bot, 'shard_ids', None)
+    if not shard_count or shard_ids is None:
+        return True
+    shard_id = (int(guild_id) >> 22) % shard_count if guild_id is not None else 0
+    return shard_id in shard_ids
+
+def load_scheduled_mutes(bot):
+    """Заполняет планировщик из базы (при старте бота), только муты своих гильдий"""
+    for mute in mute_store.all():
+        if not serves_guild(bot, mute['guild_id']):
+            continue
+        deadline = _until_timestamp(mute['until'])
+        if deadline is not None:
+            mute_scheduler.schedule(_mute_key(mute['user_id'], mute['guild_id']), deadline)
 
 def has_any_role(member, role_ids):
     return any(role.id in role_ids for role in member.roles)
 
 def get_log_channel(guild: discord.Guild):
-    channel = None
-    
-    try:
-        log_channel_id = getattr(config, 'LOG_CHANNEL_ID', None)
-        if log_channel_id:
-            ch = guild.get_channel(int(log_channel_id))
-            if isinstance(ch, discord.TextChannel):
-                return ch
-    except (ValueError, AttributeError):
-        pass
-    
-    common_names = ['mod-logs', 'moderation-logs', 'logs', 'modlogs', 'audit-logs']
-    for ch in guild.text_channels:
-        if ch.name.lower() in common_names and ch.permissions_for(guild.me).send_messages:
-            return ch
-    
-    if guild.system_channel and guild.system_channel.permissions_for(guild.me).send_messages:
-        return guild.system_channel
-        
-    return None
+    return alert_channel_resolver.resolve(guild, 'log')
 
 class ModerationCog(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
         self.check_mutes_task = self.bot.loop.create_task(self.check_mutes_loop())
         
+    def cog_unload(self):
+        self.check_mutes_task.cancel()
+        action_log.close()
+        
     def get_guild_language(self, guild_id: int) -> str:
         return config_manager.get_guild_language(guild_id)
         
@@ -180,40 +188,28 @@ class ModerationCog(commands.Cog):
         await ctx.respond(embed=embed, ephemeral=True)
         
         # Log the language change
-        self.log_action("language_change", str(ctx.author), f"Set language to {language}", "", lang_code)
+        self.log_action("language_change", str(ctx.author), f"Set language to {language}", "", lang_code, guild_id=ctx.guild.id)
     async def check_mutes_loop(self):
         await self.bot.wait_until_ready()
+        load_scheduled_mutes(self.bot)
         while not self.bot.is_closed():
-            await self.check_expired_mutes()
-            await asyncio.sleep(60)  # Проверять раз в минуту
-    async def check_expired_mutes(self):
-        if not MUTED_USERS_FILE.exists():
-            return
-            
-        lang = self.get_guild_language(ctx.guild.id) if hasattr(ctx, 'guild') else 'ru'
-            
-        with MUTED_USERS_FILE.open(encoding='utf-8') as f:
-            try:
-                mutes = json.load(f)
-            except json.JSONDecodeError:
-                mutes = []
-                
-        now = datetime.now(timezone.utc)
-        updated_mutes = []
+            # Спим до ближайшего срока, а не сканируем все муты раз в минуту
+            due = await mute_scheduler.wait_due()
+            await self.check_expired_mutes(due)
+    async def check_expired_mutes(self, due):
+        now = datetime.now(timezone.utc).strftime(UNTIL_FORMAT)
         
-        for mute in mutes:
-            try:
-                until = datetime.strptime(mute['until'], '%Y-%m-%d %H:%M:%S').replace(tzinfo=timezone.utc)
-            except (ValueError, KeyError):
-                updated_mutes.append(mute)
+        for guild_id, user_id in due:
+            mute = mute_store.get(user_id, guild_id)
+            # Мут могли снять или продлить после постановки в очередь
+            if not mute or not mute['until'] or mute['until'] > now:
                 continue
-                
-            if until > now:
-                updated_mutes.append(mute)
+            # Мут чужой гильдии снимает и записывает в лог процесс, который её обслуживает
+            if not serves_guild(self.bot, mute.get('guild_id')):
                 continue
-                
             target_member = None
             guild_id = mute.get('guild_id')
+            lang = self.get_guild_language(int(guild_id)) if guild_id else 'ru'
             
             if guild_id:
                 guild = self.bot.get_guild(int(guild_id))
@@ -238,34 +234,24 @@ class ModerationCog(commands.Cog):
                     mute['user_id']
                 )
             )
-        with MUTED_USERS_FILE.open('w', encoding='utf-8') as f:
-            json.dump(updated_mutes, f, ensure_ascii=False, indent=2)
+            mute_store.remove_expired(mute['user_id'], guild_id, now)
 
-    def log_action(self, action: str, moderator: str, target: str, reason: str, duration: str = None, lang: str = None):
+    def log_action(self, action: str, moderator: str, target: str, reason: str, duration: str = None, lang: str = None,
+                   guild_id: int = None, user_id: int = None):
         if lang is None:
             lang = 'ru'  # Default to Russian if no language context
         timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
         duration_str = f" {get_text('moderation.mute.duration', lang).lower()} {duration}" if duration else ""
         log_message = f"[{timestamp}] {action.upper()}: {moderator} -> {target}{duration_str} | {get_text('moderation.mute.reason', lang)}: {reason}"
-        logger.info(log_message)
-        if not getattr(config, 'SUPPRESS_LOGS', False):
-            print(log_message)
+        logger.info(log_message, extra={"action": action.lower(), "guild_id": guild_id, "user_id": user_id})
 
     async def send_moderation_embed(self, ctx, action: str, target: discord.Member, reason: str, duration: str = None, dm: bool = False, lang: str = None):
         if lang is None:
             lang = self.get_guild_language(ctx.guild.id) if hasattr(ctx, 'guild') else 'ru'
-        titles = {
-            "mute": get_text('moderation.mute.title', lang),
-            "timeout": get_text('moderation.timeout.title', lang),
-            "ban": get_text('moderation.ban.title', lang),
-            "kick": get_text('moderation.kick.title', lang),
-            "unmute": get_text('moderation.unmute.title', lang),
-            "unban": get_text('moderation.unban.title', lang),
-            "voicemute": get_text('moderation.voicemute.title', lang),
-            "unvoicemute": get_text('moderation.unvoicemute.title', lang)
-        }
+        # Берём только нужный заголовок вместо сборки словаря на каждое действие
+        title = get_text(f'moderation.{action}.title', lang) if action in EMBED_TITLE_ACTIONS else action.title()
         embed = discord.Embed(
-            title=titles.get(action, action.title()),
+            title=title,
             description=f"**Пользователь:** {target.mention}\n**Причина:** {reason}",
             color=discord.Color.red() if action in ["mute", "timeout", "ban", "kick", "voicemute"] else discord.Color.green(),
             timestamp=datetime.now()
@@ -283,9 +269,14 @@ class ModerationCog(commands.Cog):
             except Exception:
                 pass
         else:
-            msg = await ctx.send(embed=embed)
-            await asyncio.sleep(5)
-            await msg.delete()
+            await ctx.send(embed=embed, delete_after=CONFIRMATION_LIFETIME)
+
+    async def dispatch_notifications(self, *sends):
+        """Отправляет ЛС и лог параллельно; ошибка одной отправки не отменяет другую"""
+        results = await asyncio.gather(*sends, return_exceptions=True)
+        for result in results:
+            if isinstance(result, Exception):
+                logger.error(f"Ошибка отправки уведомления: {result}")
 
     async def send_log_to_channel(self, guild, embed):
         log_channel = get_log_channel(guild)
@@ -306,7 +297,7 @@ class ModerationCog(commands.Cog):
             until = datetime.now(timezone.utc) + duration_delta
             await member.timeout(until, reason=reason)
             
-            self.log_action("mute", str(ctx.author), str(member), reason, duration_str, lang)
+            self.log_action("mute", str(ctx.author), str(member), reason, duration_str, lang, guild_id=ctx.guild.id, user_id=member.id)
             log_action_to_file(
                 f"[MUTE] {member} ({member.id}) {get_text('moderation.until', lang, lang=lang)} "
                 f"{until.strftime('%Y-%m-%d %H:%M:%S')} | "
@@ -351,14 +342,14 @@ class ModerationCog(commands.Cog):
             )
             
             if isinstance(ctx, commands.Context):
-                msg = await ctx.send(embed=embed)
-                await asyncio.sleep(5)
-                await msg.delete()
+                await ctx.send(embed=embed, delete_after=CONFIRMATION_LIFETIME)
             else:
                 await ctx.respond(embed=embed, ephemeral=True)
                 
-            await self.send_moderation_embed(ctx, "mute", member, reason, duration_str, dm=True, lang=lang)
-            await self.send_log_to_channel(ctx.guild, embed)
+            await self.dispatch_notifications(
+                self.send_moderation_embed(ctx, "mute", member, reason, duration_str, dm=True, lang=lang),
+                self.send_log_to_channel(ctx.guild, embed)
+            )
             return True
             
         except ValueError as e:
@@ -387,7 +378,7 @@ class ModerationCog(commands.Cog):
             duration_str = format_duration(duration_delta)
             until = datetime.now(timezone.utc) + duration_delta
             await member.timeout(until, reason=reason)
-            self.log_action("mute", str(ctx.author), str(member), reason, duration_str)
+            self.log_action("mute", str(ctx.author), str(member), reason, duration_str, guild_id=ctx.guild.id, user_id=member.id)
             # --- LOG TO FILE ---
             log_action_to_file(f"[MUTE] {member} ({member.id}) до {until.strftime('%Y-%m-%d %H:%M:%S')} | Причина: {reason}")
             add_mute_to_file(member.id, str(member), until.strftime('%Y-%m-%d %H:%M:%S'), reason, guild_id=ctx.guild.id)
@@ -401,11 +392,11 @@ class ModerationCog(commands.Cog):
             embed.add_field(name="Модератор", value=ctx.author.mention, inline=True)
             embed.set_footer(text=f"ID: {member.id}")
             embed.add_field(name='❓Вы не согласны с наказанием?', value='Обратитесь в поддержку, чтобы оправдать его! 🛑', inline=False)
-            msg = await ctx.send(embed=embed)
-            await asyncio.sleep(5)
-            await msg.delete()
-            await self.send_moderation_embed(ctx, "mute", member, reason, duration_str, dm=True)
-            await self.send_log_to_channel(ctx.guild, embed)
+            await ctx.send(embed=embed, delete_after=CONFIRMATION_LIFETIME)
+            await self.dispatch_notifications(
+                self.send_moderation_embed(ctx, "mute", member, reason, duration_str, dm=True),
+                self.send_log_to_channel(ctx.guild, embed)
+            )
         except ValueError as e:
             await ctx.send(f"❌ Неверный формат длительности: {e}")
         except discord.Forbidden:
@@ -428,7 +419,7 @@ class ModerationCog(commands.Cog):
             duration_str = format_duration(duration_delta)
             until = datetime.now(timezone.utc) + duration_delta
             await user.timeout(until, reason=reason)
-            self.log_action("mute", str(ctx.author), str(user), reason, duration_str)
+            self.log_action("mute", str(ctx.author), str(user), reason, duration_str, guild_id=ctx.guild.id, user_id=user.id)
             # --- LOG TO FILE ---
             log_action_to_file(f"[MUTE] {user} ({user.id}) до {until.strftime('%Y-%m-%d %H:%M:%S')} | Причина: {reason}")
             add_mute_to_file(user.id, str(user), until.strftime('%Y-%m-%d %H:%M:%S'), reason, guild_id=ctx.guild.id)
@@ -442,11 +433,11 @@ class ModerationCog(commands.Cog):
             embed.add_field(name="Модератор", value=ctx.author.mention, inline=True)
             embed.set_footer(text=f"ID: {user.id}")
             embed.add_field(name='❓Вы не согласны с наказанием?', value='Обратитесь в поддержку, чтобы оправдать его! 🛑', inline=False)
-            msg = await ctx.respond(embed=embed)
-            await asyncio.sleep(5)
-            await ctx.interaction.delete_original_response()
-            await self.send_moderation_embed(ctx, "mute", user, reason, duration_str, dm=True)
-            await self.send_log_to_channel(ctx.guild, embed)
+            await ctx.respond(embed=embed, delete_after=CONFIRMATION_LIFETIME)
+            await self.dispatch_notifications(
+                self.send_moderation_embed(ctx, "mute", user, reason, duration_str, dm=True),
+                self.send_log_to_channel(ctx.guild, embed)
+            )
         except ValueError as e:
             await ctx.respond(f"❌ Неверный формат длительности: {e}", ephemeral=True)
         except discord.Forbidden:
@@ -461,7 +452,7 @@ class ModerationCog(commands.Cog):
     async def prefix_ban(self, ctx: Context, member: discord.Member, *, reason: str = "Без причины"):
         try:
             await member.ban(reason=reason)
-            self.log_action("ban", str(ctx.author), str(member), reason)
+            self.log_action("ban", str(ctx.author), str(member), reason, guild_id=ctx.guild.id, user_id=member.id)
             embed = discord.Embed(
                 title="⛔ Бан",
                 description=f"**Пользователь:** {member.mention}\n**Причина:** {reason}",
@@ -471,11 +462,11 @@ class ModerationCog(commands.Cog):
             embed.add_field(name="Модератор", value=ctx.author.mention, inline=True)
             embed.set_footer(text=f"ID: {member.id}")
             embed.add_field(name='❓Вы не согласны с наказанием?', value='Обратитесь в поддержку, чтобы оправдать его! 🛑', inline=False)
-            msg = await ctx.send(embed=embed)
-            await asyncio.sleep(5)
-            await msg.delete()
-            await self.send_moderation_embed(ctx, "ban", member, reason)
-            await self.send_log_to_channel(ctx.guild, embed)
+            await ctx.send(embed=embed, delete_after=CONFIRMATION_LIFETIME)
+            await self.dispatch_notifications(
+                self.send_moderation_embed(ctx, "ban", member, reason),
+                self.send_log_to_channel(ctx.guild, embed)
+            )
         except discord.Forbidden:
             await ctx.send("❌ У меня нет прав для бана этого пользователя!")
         except Exception as e:
@@ -493,7 +484,7 @@ class ModerationCog(commands.Cog):
         reason = reason or get_text('moderation.no_reason', lang)
         try:
             await user.ban(reason=reason)
-            self.log_action("ban", str(ctx.author), str(user), reason, lang=lang)
+            self.log_action("ban", str(ctx.author), str(user), reason, lang=lang, guild_id=ctx.guild.id, user_id=user.id)
             embed = discord.Embed(
                 title="⛔ Бан",
                 description=f"**Пользователь:** {user.mention}\n**Причина:** {reason}",
@@ -503,9 +494,7 @@ class ModerationCog(commands.Cog):
             embed.add_field(name="Модератор", value=ctx.author.mention, inline=True)
             embed.set_footer(text=f"ID: {user.id}")
             embed.add_field(name='❓Вы не согласны с наказанием?', value='Обратитесь в поддержку, чтобы оправдать его! 🛑', inline=False)
-            msg = await ctx.respond(embed=embed)
-            await asyncio.sleep(5)
-            await ctx.interaction.delete_original_response()
+            await ctx.respond(embed=embed, delete_after=CONFIRMATION_LIFETIME)
             await self.send_log_to_channel(ctx.guild, embed)
         except discord.Forbidden:
             await ctx.respond("❌ У меня нет прав для бана этого пользователя!", ephemeral=True)
@@ -519,7 +508,7 @@ class ModerationCog(commands.Cog):
     async def prefix_kick(self, ctx: Context, member: discord.Member, *, reason: str = "Без причины"):
         try:
             await member.kick(reason=reason)
-            self.log_action("kick", str(ctx.author), str(member), reason)
+            self.log_action("kick", str(ctx.author), str(member), reason, guild_id=ctx.guild.id, user_id=member.id)
             embed = discord.Embed(
                 title="👢 Кик",
                 description=f"**Пользователь:** {member.mention}\n**Причина:** {reason}",
@@ -529,11 +518,11 @@ class ModerationCog(commands.Cog):
             embed.add_field(name="Модератор", value=ctx.author.mention, inline=True)
             embed.set_footer(text=f"ID: {member.id}")
             embed.add_field(name='❓Вы не согласны с наказанием?', value='Обратитесь в поддержку, чтобы оправдать его! 🛑', inline=False)
-            msg = await ctx.send(embed=embed)
-            await asyncio.sleep(5)
-            await msg.delete()
-            await self.send_moderation_embed(ctx, "kick", member, reason)
-            await self.send_log_to_channel(ctx.guild, embed)
+            await ctx.send(embed=embed, delete_after=CONFIRMATION_LIFETIME)
+            await self.dispatch_notifications(
+                self.send_moderation_embed(ctx, "kick", member, reason),
+                self.send_log_to_channel(ctx.guild, embed)
+            )
         except discord.Forbidden:
             await ctx.send("❌ У меня нет прав для кика этого пользователя!")
         except Exception as e:
@@ -551,7 +540,7 @@ class ModerationCog(commands.Cog):
         reason = reason or get_text('moderation.no_reason', lang)
         try:
             await user.kick(reason=reason)
-            self.log_action("kick", str(ctx.author), str(user), reason, lang=lang)
+            self.log_action("kick", str(ctx.author), str(user), reason, lang=lang, guild_id=ctx.guild.id, user_id=user.id)
             embed = discord.Embed(
                 title="👢 Кик",
                 description=f"**Пользователь:** {user.mention}\n**Причина:** {reason}",
@@ -561,11 +550,11 @@ class ModerationCog(commands.Cog):
             embed.add_field(name="Модератор", value=ctx.author.mention, inline=True)
             embed.set_footer(text=f"ID: {user.id}")
             embed.add_field(name='❓Вы не согласны с наказанием?', value='Обратитесь в поддержку, чтобы оправдать его! 🛑', inline=False)
-            msg = await ctx.respond(embed=embed)
-            await asyncio.sleep(5)
-            await ctx.interaction.delete_original_response()
-            await self.send_moderation_embed(ctx, "kick", user, reason, lang=lang)
-            await self.send_log_to_channel(ctx.guild, embed)
+            await ctx.respond(embed=embed, delete_after=CONFIRMATION_LIFETIME)
+            await self.dispatch_notifications(
+                self.send_moderation_embed(ctx, "kick", user, reason, lang=lang),
+                self.send_log_to_channel(ctx.guild, embed)
+            )
         except discord.Forbidden:
             await ctx.respond("❌ У меня нет прав для кика этого пользователя!", ephemeral=True)
         except Exception as e:
@@ -578,7 +567,7 @@ class ModerationCog(commands.Cog):
     async def prefix_unmute(self, ctx: Context, member: discord.Member, *, reason: str = "Без причины"):
         try:
             await member.timeout(None, reason=reason)
-            self.log_action("unmute", str(ctx.author), str(member), reason)
+            self.log_action("unmute", str(ctx.author), str(member), reason, guild_id=ctx.guild.id, user_id=member.id)
             # --- LOG TO FILE ---
             log_action_to_file(f"[UNMUTE] {member} ({member.id}) | Причина: {reason}")
             remove_mute_from_file(member.id, guild_id=ctx.guild.id)
@@ -591,11 +580,11 @@ class ModerationCog(commands.Cog):
             embed.add_field(name="Модератор", value=ctx.author.mention, inline=True)
             embed.set_footer(text=f"ID: {member.id}")
             embed.add_field(name='❓Вы не согласны с наказанием?', value='Обратитесь в поддержку, чтобы оправдать его! 🛑', inline=False)
-            msg = await ctx.send(embed=embed)
-            await asyncio.sleep(5)
-            await msg.delete()
-            await self.send_moderation_embed(ctx, "unmute", member, reason)
-            await self.send_log_to_channel(ctx.guild, embed)
+            await ctx.send(embed=embed, delete_after=CONFIRMATION_LIFETIME)
+            await self.dispatch_notifications(
+                self.send_moderation_embed(ctx, "unmute", member, reason),
+                self.send_log_to_channel(ctx.guild, embed)
+            )
         except discord.Forbidden:
             await ctx.send("❌ У меня нет прав для снятия мута с этого пользователя!")
         except Exception as e:
@@ -613,7 +602,7 @@ class ModerationCog(commands.Cog):
         reason = reason or get_text('moderation.no_reason', lang)
         try:
             await user.timeout(None, reason=reason)
-            self.log_action("unmute", str(ctx.author), str(user), reason, lang=lang)
+            self.log_action("unmute", str(ctx.author), str(user), reason, lang=lang, guild_id=ctx.guild.id, user_id=user.id)
             # --- LOG TO FILE ---
             log_action_to_file(f"[UNMUTE] {user} ({user.id}) | Причина: {reason}")
             remove_mute_from_file(user.id, guild_id=ctx.guild.id)
@@ -626,11 +615,11 @@ class ModerationCog(commands.Cog):
             embed.add_field(name="Модератор", value=ctx.author.mention, inline=True)
             embed.set_footer(text=f"ID: {user.id}")
             embed.add_field(name='❓Вы не согласны с наказанием?', value='Обратитесь в поддержку, чтобы оправдать его! 🛑', inline=False)
-            msg = await ctx.respond(embed=embed)
-            await asyncio.sleep(5)
-            await ctx.interaction.delete_original_response()
-            await self.send_moderation_embed(ctx, "unmute", user, reason, lang=lang)
-            await self.send_log_to_channel(ctx.guild, embed)
+            await ctx.respond(embed=embed, delete_after=CONFIRMATION_LIFETIME)
+            await self.dispatch_notifications(
+                self.send_moderation_embed(ctx, "unmute", user, reason, lang=lang),
+                self.send_log_to_channel(ctx.guild, embed)
+            )
         except discord.Forbidden:
             await ctx.respond("❌ У меня нет прав для снятия мута с этого пользователя!", ephemeral=True)
         except Exception as e:
@@ -647,7 +636,7 @@ class ModerationCog(commands.Cog):
         try:
             user = await self.bot.fetch_user(user_id)
             await ctx.guild.unban(user, reason=reason)
-            self.log_action("unban", str(ctx.author), str(user), reason)
+            self.log_action("unban", str(ctx.author), str(user), reason, guild_id=ctx.guild.id, user_id=user.id)
             embed = discord.Embed(
                 title="✅ Разбан",
                 description=f"**Пользователь:** {user.mention}\n**Причина:** {reason}",
@@ -657,9 +646,7 @@ class ModerationCog(commands.Cog):
             embed.add_field(name="Модератор", value=ctx.author.mention, inline=True)
             embed.set_footer(text=f"ID: {user.id}")
             embed.add_field(name='❓Вы не согласны с наказанием?', value='Обратитесь в поддержку, чтобы оправдать его! 🛑', inline=False)
-            msg = await ctx.send(embed=embed)
-            await asyncio.sleep(5)
-            await msg.delete()
+            await ctx.send(embed=embed, delete_after=CONFIRMATION_LIFETIME)
             await self.send_log_to_channel(ctx.guild, embed)
         except discord.NotFound:
             await ctx.send("❌ Пользователь не найден!")
@@ -682,7 +669,7 @@ class ModerationCog(commands.Cog):
         try:
             user = await self.bot.fetch_user(user_id)
             await ctx.guild.unban(user, reason=reason)
-            self.log_action("unban", str(ctx.author), str(user), reason, lang=lang)
+            self.log_action("unban", str(ctx.author), str(user), reason, lang=lang, guild_id=ctx.guild.id, user_id=user.id)
             embed = discord.Embed(
                 title="✅ Разбан",
                 description=f"**Пользователь:** {user.mention}\n**Причина:** {reason}",
@@ -692,9 +679,7 @@ class ModerationCog(commands.Cog):
             embed.add_field(name="Модератор", value=ctx.author.mention, inline=True)
             embed.set_footer(text=f"ID: {user.id}")
             embed.add_field(name='❓Вы не согласны с наказанием?', value='Обратитесь в поддержку, чтобы оправдать его! 🛑', inline=False)
-            msg = await ctx.respond(embed=embed)
-            await asyncio.sleep(5)
-            await ctx.interaction.delete_original_response()
+            await ctx.respond(embed=embed, delete_after=CONFIRMATION_LIFETIME)
             await self.send_log_to_channel(ctx.guild, embed)
         except discord.NotFound:
             await ctx.respond("❌ Пользователь не найден!", ephemeral=True)
@@ -721,7 +706,7 @@ class ModerationCog(commands.Cog):
             return
         try:
             await member.edit(mute=True, reason=reason)
-            self.log_action("voicemute", str(ctx.author), str(member), reason)
+            self.log_action("voicemute", str(ctx.author), str(member), reason, guild_id=ctx.guild.id, user_id=member.id)
             embed = discord.Embed(
                 title="🔇 Voice Мут",
                 description=f"**Пользователь:** {member.mention}\n**Причина:** {reason}",
@@ -731,11 +716,11 @@ class ModerationCog(commands.Cog):
             embed.add_field(name="Модератор", value=ctx.author.mention, inline=True)
             embed.set_footer(text=f"ID: {member.id}")
             embed.add_field(name='❓Вы не согласны с наказанием?', value='Обратитесь в поддержку, чтобы оправдать его! 🛑', inline=False)
-            msg = await ctx.send(embed=embed)
-            await asyncio.sleep(5)
-            await msg.delete()
-            await self.send_moderation_embed(ctx, "voicemute", member, reason)
-            await self.send_log_to_channel(ctx.guild, embed)
+            await ctx.send(embed=embed, delete_after=CONFIRMATION_LIFETIME)
+            await self.dispatch_notifications(
+                self.send_moderation_embed(ctx, "voicemute", member, reason),
+                self.send_log_to_channel(ctx.guild, embed)
+            )
         except Exception as e:
             logger.error(f"Ошибка в команде voicemute: {e}")
             await ctx.send("❌ Произошла ошибка при voice mute пользователя.")
@@ -752,7 +737,7 @@ class ModerationCog(commands.Cog):
             return
         try:
             await user.edit(mute=True, reason=reason)
-            self.log_action("voicemute", str(ctx.author), str(user), reason)
+            self.log_action("voicemute", str(ctx.author), str(user), reason, guild_id=ctx.guild.id, user_id=user.id)
             embed = discord.Embed(
                 title="🔇 Voice Мут",
                 description=f"**Пользователь:** {user.mention}\n**Причина:** {reason}",
@@ -762,11 +747,11 @@ class ModerationCog(commands.Cog):
             embed.add_field(name="Модератор", value=ctx.author.mention, inline=True)
             embed.set_footer(text=f"ID: {user.id}")
             embed.add_field(name='❓Вы не согласны с наказанием?', value='Обратитесь в поддержку, чтобы оправдать его! 🛑', inline=False)
-            msg = await ctx.respond(embed=embed)
-            await asyncio.sleep(5)
-            await ctx.interaction.delete_original_response()
-            await self.send_moderation_embed(ctx, "voicemute", user, reason)
-            await self.send_log_to_channel(ctx.guild, embed)
+            await ctx.respond(embed=embed, delete_after=CONFIRMATION_LIFETIME)
+            await self.dispatch_notifications(
+                self.send_moderation_embed(ctx, "voicemute", user, reason),
+                self.send_log_to_channel(ctx.guild, embed)
+            )
         except Exception as e:
             logger.error(f"Ошибка в команде voicemute: {e}")
             await ctx.respond("❌ Произошла ошибка при voice mute пользователя.", ephemeral=True)
@@ -788,7 +773,7 @@ class ModerationCog(commands.Cog):
             return
         try:
             await member.edit(mute=False, reason=reason)
-            self.log_action("unvoicemute", str(ctx.author), str(member), reason)
+            self.log_action("unvoicemute", str(ctx.author), str(member), reason, guild_id=ctx.guild.id, user_id=member.id)
             embed = discord.Embed(
                 title="🔊 Снятие voice мута",
                 description=f"**Пользователь:** {member.mention}\n**Причина:** {reason}",
@@ -798,11 +783,11 @@ class ModerationCog(commands.Cog):
             embed.add_field(name="Модератор", value=ctx.author.mention, inline=True)
             embed.set_footer(text=f"ID: {member.id}")
             embed.add_field(name='❓Вы не согласны с наказанием?', value='Обратитесь в поддержку, чтобы оправдать его! 🛑', inline=False)
-            msg = await ctx.send(embed=embed)
-            await asyncio.sleep(5)
-            await msg.delete()
-            await self.send_moderation_embed(ctx, "unvoicemute", member, reason)
-            await self.send_log_to_channel(ctx.guild, embed)
+            await ctx.send(embed=embed, delete_after=CONFIRMATION_LIFETIME)
+            await self.dispatch_notifications(
+                self.send_moderation_embed(ctx, "unvoicemute", member, reason),
+                self.send_log_to_channel(ctx.guild, embed)
+            )
         except Exception as e:
             logger.error(f"Ошибка в команде unvoicemute: {e}")
             await ctx.send("❌ Произошла ошибка при снятии voice mute пользователя.")
@@ -819,7 +804,7 @@ class ModerationCog(commands.Cog):
             return
         try:
             await user.edit(mute=False, reason=reason)
-            self.log_action("unvoicemute", str(ctx.author), str(user), reason)
+            self.log_action("unvoicemute", str(ctx.author), str(user), reason, guild_id=ctx.guild.id, user_id=user.id)
             embed = discord.Embed(
                 title="🔊 Снятие voice мута",
                 description=f"**Пользователь:** {user.mention}\n**Причина:** {reason}",
@@ -829,11 +814,11 @@ class ModerationCog(commands.Cog):
             embed.add_field(name="Модератор", value=ctx.author.mention, inline=True)
             embed.set_footer(text=f"ID: {user.id}")
             embed.add_field(name='❓Вы не согласны с наказанием?', value='Обратитесь в поддержку, чтобы оправдать его! 🛑', inline=False)
-            msg = await ctx.respond(embed=embed)
-            await asyncio.sleep(5)
-            await ctx.interaction.delete_original_response()
-            await self.send_moderation_embed(ctx, "unvoicemute", user, reason)
-            await self.send_log_to_channel(ctx.guild, embed)
+            await ctx.respond(embed=embed, delete_after=CONFIRMATION_LIFETIME)
+            await self.dispatch_notifications(
+                self.send_moderation_embed(ctx, "unvoicemute", user, reason),
+                self.send_log_to_channel(ctx.guild, embed)
+            )
         except Exception as e:
             logger.error(f"Ошибка в команде unvoicemute: {e}")
             await ctx.respond("❌ Произошла ошибка при снятии voice mute пользователя.", ephemeral=True)
@@ -844,6 +829,129 @@ class ModerationCog(commands.Cog):
                         reason: Option(str, "Причина действия (опционально)", default="Без причины")):
         await self.unvoicemute_slash.callback(self, ctx, user, reason)
 
+    # --- МАССОВЫЕ ДЕЙСТВИЯ ---
+    def resolve_bulk_targets(self, ctx, members, reason):
+        """Собирает цели из упоминаний/ID и селектора joined:N. Возвращает (цели, причина).
+        Цели - участники или discord.Object для ушедших с сервера (только massban)"""
+        targets = list(members)
+        match = JOINED_SELECTOR.match(reason or "")
+        if match:
+            cutoff = datetime.now(timezone.utc) - timedelta(minutes=int(match.group(1)))
+            targets.extend(m for m in ctx.guild.members if m.joined_at and m.joined_at >= cutoff)
+            reason = match.group(2).strip() or None
+        
+        # Без дублей; себя, бота и администраторов не трогаем
+        seen = set()
+        result = []
+        for member in targets:
+            if member.id in seen or member.id in (ctx.author.id, ctx.guild.me.id):
+                continue
+            if isinstance(member, discord.Member) and member.guild_permissions.administrator:
+                continue
+            seen.add(member.id)
+            result.append(member)
+        return result, reason
+
+    async def run_bulk(self, targets, action):
+        """Выполняет action(member) для всех целей с ограниченной параллельностью.
+        Возвращает (успешные, [(участник, ошибка)])"""
+        semaphore = asyncio.Semaphore(BULK_CONCURRENCY)
+
+        async def worker(member):
+            async with semaphore:
+                try:
+                    await action(member)
+                    return member, None
+                except Exception as e:
+                    return member, e
+
+        done, failed = [], []
+        for member, error in await asyncio.gather(*(worker(m) for m in targets)):
+            if error is None:
+                done.append(member)
+            else:
+                failed.append((member, error))
+        return done, failed
+
+    async def bulk_action(self, ctx, action_name: str, title: str, targets, reason: str, action, duration_str: str = None):
+        """Общая часть массовых команд: проверка, выполнение, один сводный embed"""
+        if not targets:
+            await ctx.send("❌ Не указано ни одной подходящей цели (упоминания, ID или joined:<минуты>).")
+            return
+        if len(targets) > BULK_MAX_TARGETS:
+            await ctx.send(f"❌ Слишком много целей: {len(targets)} (максимум {BULK_MAX_TARGETS}).")
+            return
+        
+        status = await ctx.send(f"⏳ Обработка {len(targets)} пользователей...")
+        done, failed = await self.run_bulk(targets, action)
+        self.log_action(action_name, str(ctx.author), f"{len(done)} пользователей", reason, duration_str,
+                        guild_id=ctx.guild.id)
+        
+        embed = discord.Embed(
+            title=title,
+            description=f"**Успешно:** {len(done)}\n**Ошибок:** {len(failed)}\n**Причина:** {reason}",
+            color=discord.Color.red(),
+            timestamp=datetime.now()
+        )
+        if duration_str:
+            embed.add_field(name="Длительность", value=duration_str, inline=True)
+        embed.add_field(name="Модератор", value=ctx.author.mention, inline=True)
+        if done:
+            users = ", ".join(f"<@{m.id}>" for m in done)
+            embed.add_field(name="Пользователи", value=users if len(users) <= 1024 else users[:1000] + " …", inline=False)
+        if failed:
+            errors = "\n".join(f"<@{m.id}> — {type(e).__name__}" for m, e in failed[:10])
+            embed.add_field(name="Не удалось", value=errors, inline=False)
+        
+        await self.dispatch_notifications(
+            status.edit(content=None, embed=embed),
+            self.send_log_to_channel(ctx.guild, embed)
+        )
+
+    @commands.command(name="massmute", aliases=["массмут"], help="Замутить нескольких пользователей: massmute <время> @a @b ... | joined:<минуты> [причина]")
+    @commands.has_permissions(administrator=True)
+    async def mass_mute(self, ctx: Context, duration: str, members: commands.Greedy[discord.Member], *, reason: str = None):
+        targets, reason = self.resolve_bulk_targets(ctx, members, reason)
+        reason = reason or "Без причины"
+        try:
+            duration_delta = parse_duration(duration)
+        except ValueError as e:
+            await ctx.send(f"❌ Неверный формат длительности: {e}")
+            return
+        duration_str = format_duration(duration_delta)
+        until = datetime.now(timezone.utc) + duration_delta
+
+        async def mute(member):
+            await member.timeout(until, reason=reason)
+            log_action_to_file(f"[MUTE] {member} ({member.id}) до {until.strftime('%Y-%m-%d %H:%M:%S')} | Причина: {reason}")
+            add_mute_to_file(member.id, str(member), until.strftime(UNTIL_FORMAT), reason, guild_id=ctx.guild.id)
+
+        await self.bulk_action(ctx, "massmute", "🔇 Массовый мут", targets, reason, mute, duration_str)
+
+    @commands.command(name="masskick", aliases=["масскик"], help="Кикнуть нескольких пользователей: masskick @a @b ... | joined:<минуты> [причина]")
+    @commands.has_permissions(administrator=True)
+    async def mass_kick(self, ctx: Context, members: commands.Greedy[discord.Member], *, reason: str = None):
+        targets, reason = self.resolve_bulk_targets(ctx, members, reason)
+        reason = reason or "Без причины"
+
+        async def kick(member):
+            await member.kick(reason=reason)
+
+        await self.bulk_action(ctx, "masskick", "👢 Массовый кик", targets, reason, kick)
+
+    @commands.command(name="massban", aliases=["массбан"], help="Забанить нескольких пользователей (и ушедших, по ID): massban @a @b ID ... | joined:<минуты> [причина]")
+    @commands.has_permissions(administrator=True)
+    async def mass_ban(self, ctx: Context, users: commands.Greedy[discord.Object], *, reason: str = None):
+        # discord.Object, а не Member: рейдеры, уже покинувшие сервер, тоже банятся по ID
+        members = [ctx.guild.get_member(user.id) or user for user in users]
+        targets, reason = self.resolve_bulk_targets(ctx, members, reason)
+        reason = reason or "Без причины"
+
+        async def ban(target):
+            await ctx.guild.ban(target, reason=reason)
+
+        await self.bulk_action(ctx, "massban", "⛔ Массовый бан", targets, reason, ban)
+
     # --- СТАТИСТИКА СЕРВЕРА ---
     @commands.command(name="stats", help="Показать статистику сервера")
     async def prefix_stats(self, ctx: Context):
@@ -856,25 +964,15 @@ class ModerationCog(commands.Cog):
             online_members = len([m for m in guild.members if m.status != discord.Status.offline])
             
             # Подсчитываем активные муты
-            active_mutes = 0
-            if MUTED_USERS_FILE.exists():
-                with MUTED_USERS_FILE.open(encoding='utf-8') as f:
-                    try:
-                        mutes = json.load(f)
-                        active_mutes = len(mutes)
-                    except Exception:
-                        active_mutes = 0
+            active_mutes = mute_store.count()
             
             # Подсчитываем запрещённые слова
-            blocked_words = 0
-            blocked_words_file = Path('discord_blocked_words_full.txt')
-            if blocked_words_file.exists():
-                with blocked_words_file.open(encoding='utf-8') as f:
-                    blocked_words = len([line.strip() for line in f if line.strip()])
+            blocked_words = len(blocked_word_list)
             
             # Подсчитываем муты за сегодня
             today_mutes = 0
             today = datetime.now().strftime('%Y-%m-%d')
+            await asyncio.to_thread(action_log.flush, 5)
             if BOT_ACTIONS_LOG.exists():
                 with BOT_ACTIONS_LOG.open(encoding='utf-8') as f:
                     for line in f:
@@ -9,4 +9,14 @@ BOT_PREFIX = "$"
 # Все настройки ролей и каналов удалены.
 # Доступ к командам реализуется через @commands.has_permissions(administrator=True) или @commands.has_role("Staff") в самих командах.
 
-ATTACK_ALERT_CHANNEL_ID = None  # Оставлено для примера, если понадобится канал для алертов
\ No newline at end of file
+ATTACK_ALERT_CHANNEL_ID = None  # Оставлено для примера, если понадобится канал для алертов
+
+# Шардинг (можно переопределить флагами --shards / --shard-ids / --processes)
+SHARD_COUNT = None  # None - без шардов, 0 - число шардов выбирает Discord
+SHARD_IDS = None    # Например "0-3" или [0, 1, 2, 3]
+
+# Логи (config/bot.log): "text" - строки как раньше, "json" - одна JSON-строка на запись
+# с полями guild_id / user_id / action для сборщика логов
+LOG_MODE = "text"
+LOG_MAX_BYTES = 10 * 1024 * 1024  # размер файла до ротации
+LOG_BACKUP_COUNT = 5             # сколько старых файлов хранить
@@ -1,17 +1,29 @@
 import os
+import sys
+import argparse
+import subprocess
 import discord
 from discord.ext import commands
+import asyncio
 import logging
+import atexit
+import queue
+from logging.handlers import QueueListener, RotatingFileHandler
 from datetime import datetime, timedelta
-from typing import Optional, Dict, Any, Union
+from typing import Optional, Dict, Any, Union, List
 from pathlib import Path
 import json
 import config
+from utils.muted_role import muted_role_provisioner
+from utils.log_format import JsonFormatter, StructuredQueueHandler
 
 # Load configuration
 DISCORD_TOKEN = getattr(config, 'DISCORD_TOKEN', None)
 BOT_PREFIX = getattr(config, 'BOT_PREFIX', '!')
 MUTED_ROLE_NAME = getattr(config, 'MUTED_ROLE_NAME', 'Muted')
+# Шардинг: None - без шардов; SHARD_COUNT = 0 - AutoShardedBot с числом шардов от Discord
+SHARD_COUNT = getattr(config, 'SHARD_COUNT', None)
+SHARD_IDS = getattr(config, 'SHARD_IDS', None)
 
 # Constants
 DEFAULT_MUTE_DURATION = timedelta(minutes=5)
@@ -19,8 +31,35 @@ CONFIG_DIR = Path('config')
 DATA_FILE = CONFIG_DIR / 'muted_users.json'
 
 # Setup logging
-def setup_logging() -> logging.Logger:
-    """Configure logging for the bot."""
+# Логгеры бота: discord_bot (main, utils), cogs.* и utils.* (logging.getLogger(__name__))
+BOT_LOGGERS = ('discord_bot', 'cogs', 'utils')
+LOG_MODE = getattr(config, 'LOG_MODE', 'text')  # "text" или "json"
+LOG_MAX_BYTES = getattr(config, 'LOG_MAX_BYTES', 10 * 1024 * 1024)
+LOG_BACKUP_COUNT = getattr(config, 'LOG_BACKUP_COUNT', 5)
+SUPPRESS_LOGS = getattr(config, 'SUPPRESS_LOGS', False)  # Только предупреждения и ошибки в консоли
+
+def log_file_path(args: argparse.Namespace) -> Path:
+    """bot.log, or bot.shards-<first>-<last>.log for a process that runs a shard range.
+    
+    Every --processes worker gets its own file: several processes rotating
+    one file would rename it under each other and lose lines.
+    """
+    if args.shard_ids and args.processes <= 1:
+        return CONFIG_DIR / f"bot.shards-{args.shard_ids[0]}-{args.shard_ids[-1]}.log"
+    return CONFIG_DIR / 'bot.log'
+
+def setup_logging(log_file: Path) -> logging.Logger:
+    """Configure logging for the bot.
+    
+    All bot loggers put records on a queue (QueueHandler); formatting and
+    writing happen in the QueueListener thread, so logging never blocks the
+    event loop. The log file rotates by size; with LOG_MODE = "json" it holds
+    one JSON object per line with guild_id / user_id / action when given in extra.
+    """
+    logger = logging.getLogger('discord_bot')
+    if any(isinstance(h, StructuredQueueHandler) for h in logger.handlers):
+        # Cogs import main again as a module: handlers are attached once
+        return logger
     CONFIG_DIR.mkdir(exist_ok=True)
     
     formatter = logging.Formatter(
@@ -28,22 +67,72 @@ def setup_logging() -> logging.Logger:
         datefmt='%Y-%m-%d %H:%M:%S'
     )
     
-    logger = logging.getLogger('discord_bot')
-    logger.setLevel(logging.INFO)
-    
-    # File handler
-    file_handler = logging.FileHandler(CONFIG_DIR / 'bot.log', encoding='utf-8')
-    file_handler.setFormatter(formatter)
-    logger.addHandler(file_handler)
+    # File handler (rotated by size)
+    file_handler = RotatingFileHandler(
+        log_file, maxBytes=LOG_MAX_BYTES, backupCount=LOG_BACKUP_COUNT, encoding='utf-8'
+    )
+    file_handler.setFormatter(JsonFormatter() if LOG_MODE == 'json' else formatter)
     
     # Console handler
     console_handler = logging.StreamHandler()
     console_handler.setFormatter(formatter)
-    logger.addHandler(console_handler)
+    if SUPPRESS_LOGS:
+        console_handler.setLevel(logging.WARNING)
+    
+    log_queue = queue.SimpleQueue()
+    listener = QueueListener(log_queue, file_handler, console_handler, respect_handler_level=True)
+    listener.start()
+    atexit.register(listener.stop)
+    
+    queue_handler = StructuredQueueHandler(log_queue)
+    for name in BOT_LOGGERS:
+        bot_logger = logging.getLogger(name)
+        bot_logger.setLevel(logging.INFO)
+        bot_logger.addHandler(queue_handler)
+        bot_logger.propagate = False
     
     return logger
 
-logger = setup_logging()
+def parse_shard_ids(value: Optional[str]) -> Optional[List[int]]:
+    """
+    Parse shard ID list like '0-3,8,10-11'.
+    
+    Args:
+        value: Comma-separated shard IDs and inclusive ranges
+        
+    Returns:
+        Optional[List[int]]: Sorted shard IDs or None if value is empty
+    """
+    if not value:
+        return None
+    shard_ids = set()
+    for part in str(value).split(','):
+        part = part.strip()
+        if '-' in part:
+            start, end = part.split('-', 1)
+            shard_ids.update(range(int(start), int(end) + 1))
+        elif part:
+            shard_ids.add(int(part))
+    return sorted(shard_ids)
+
+def parse_args(argv: List[str]) -> argparse.Namespace:
+    """Parse command line flags (sharding options override config.py)."""
+    parser = argparse.ArgumentParser(description="SimpleMuteBot")
+    parser.add_argument('--shards', '--shard-count', dest='shard_count', type=int, default=SHARD_COUNT,
+                        help="Total shard count (0 = ask Discord, implies AutoShardedBot)")
+    parser.add_argument('--shard-ids', default=SHARD_IDS if isinstance(SHARD_IDS, str) else None,
+                        help="Shards run by this process, e.g. '0-3' or '0,2,4'")
+    parser.add_argument('--processes', type=int, default=1,
+                        help="Split --shards into this many processes, each with its own shard range")
+    args, _ = parser.parse_known_args(argv)
+    args.shard_ids = parse_shard_ids(args.shard_ids) or (SHARD_IDS if isinstance(SHARD_IDS, list) else None)
+    if args.shard_ids and not args.shard_count:
+        parser.error("--shard-ids requires --shards (total shard count)")
+    return args
+
+# Флаги читаются только при запуске как скрипт (модуль также импортируется из когов)
+ARGS = parse_args(sys.argv[1:] if __name__ == "__main__" else [])
+logger = setup_logging(log_file_path(ARGS))
 
 # Конфигурация бота
 intents = discord.Intents.default()
@@ -51,11 +140,18 @@ intents.message_content = True
 intents.members = True
 intents.guilds = True
 
-bot = commands.Bot(
-    command_prefix=BOT_PREFIX,
-    intents=intents,
-    help_command=None
-)
+def create_bot(args: argparse.Namespace) -> commands.Bot:
+    """Create a plain or auto-sharded bot depending on shard options."""
+    options = dict(command_prefix=BOT_PREFIX, intents=intents, help_command=None)
+    if args.shard_count is None and not args.shard_ids:
+        return commands.Bot(**options)
+    if args.shard_count:
+        options['shard_count'] = args.shard_count
+    if args.shard_ids:
+        options['shard_ids'] = args.shard_ids
+    return commands.AutoShardedBot(**options)
+
+bot = create_bot(ARGS)
 
 # Вспомогательные функции
 
@@ -191,51 +287,48 @@ async def on_ready() -> None:
     
     logger.info(f"Logged in as {bot.user} (ID: {bot.user.id})")
     logger.info(f"Connected to {len(bot.guilds)} guilds")
+    if isinstance(bot, commands.AutoShardedBot):
+        logger.info(f"Shards: {sorted(bot.shards)} of {bot.shard_count}")
     logger.info(f"Prefix: {BOT_PREFIX}")
     
-    # Ensure muted role exists in all guilds
-    for guild in bot.guilds:
-        await ensure_muted_role(guild)
+    # Роль мута настраивается в фоне, каждый сервер сообщает о готовности сам
+    muted_role_provisioner.provision_all(bot.guilds)
         
     logger.info("Bot is ready!")
 
+@bot.event
+async def on_shard_ready(shard_id: int) -> None:
+    """Called when a single shard is ready (sharded mode only)."""
+    guilds = sum(1 for guild in bot.guilds if guild.shard_id == shard_id)
+    logger.info(f"Shard {shard_id} is ready ({guilds} guilds)")
+
 async def ensure_muted_role(guild: discord.Guild) -> Optional[discord.Role]:
-    """Ensure the muted role exists in the guild."""
-    # Check if role already exists
-    muted_role = discord.utils.get(guild.roles, name=MUTED_ROLE_NAME)
+    """Ensure the muted role exists in the guild (cached after the first lookup)."""
+    return await muted_role_provisioner.ensure_role(guild)
+
+@bot.event
+async def on_guild_join(guild: discord.Guild) -> None:
+    """Provision the muted role in a newly joined guild."""
+    muted_role_provisioner.provision(guild)
+
+@bot.event
+async def on_guild_remove(guild: discord.Guild) -> None:
+    """Drop cached muted role state for a guild the bot left."""
+    muted_role_provisioner.forget(guild.id)
+
+@bot.event
+async def on_guild_role_delete(role: discord.Role) -> None:
+    """Re-provision if the muted role was deleted."""
+    if role.name == MUTED_ROLE_NAME:
+        muted_role_provisioner.forget(role.guild.id)
+        muted_role_provisioner.provision(role.guild)
+
+@bot.event
+async def on_guild_channel_create(channel: discord.abc.GuildChannel) -> None:
+    """Apply the muted overwrite to new channels."""
+    muted_role = muted_role_provisioner.get(channel.guild)
     if muted_role:
-        return muted_role
-        
-    # Create the role if it doesn't exist
-    try:
-        logger.info(f"Creating muted role in {guild.name}")
-        muted_role = await guild.create_role(
-            name=MUTED_ROLE_NAME,
-            reason="Creating muted role for moderation"
-        )
-        
-        # Set up permissions
-        for channel in guild.channels:
-            try:
-                await channel.set_permissions(
-                    muted_role,
-                    send_messages=False,
-                    speak=False,
-                    add_reactions=False,
-                    connect=False
-                )
-            except discord.Forbidden:
-                logger.warning(f"Missing permissions to update {channel.name}")
-            except Exception as e:
-                logger.error(f"Error updating channel {channel.name}: {e}")
-                
-        return muted_role
-    except discord.Forbidden:
-        logger.error(f"Missing permissions to create muted role in {guild.name}")
-        return None
-    except Exception as e:
-        logger.error(f"Error creating muted role in {guild.name}: {e}")
-        return None
+        await muted_role_provisioner.apply_channel(channel, muted_role)
 
 @bot.event
 async def on_message(message: discord.Message) -> None:
@@ -386,7 +479,7 @@ async def unmute(
     member: Пользователь, с которого нужно снять мут
     reason: Причина снятия мута (по умолчанию: "Не указана")
     """
-    muted_role = discord.utils.get(ctx.guild.roles, name=MUTED_ROLE_NAME)
+    muted_role = muted_role_provisioner.get(ctx.guild)
     if not muted_role or muted_role not in member.roles:
         await ctx.send("❌ Этот пользователь не заглушен.")
         return
@@ -432,6 +525,15 @@ async def ping(ctx: commands.Context) -> None:
         color=discord.Color.blue()
     )
     
+    # Задержка каждого шарда этого процесса
+    if isinstance(bot, commands.AutoShardedBot):
+        current = ctx.guild.shard_id if ctx.guild else None
+        lines = [
+            f"{'➡️ ' if shard_id == current else ''}Шард {shard_id}: {round(shard_latency * 1000)}мс"
+            for shard_id, shard_latency in bot.latencies
+        ]
+        embed.add_field(name=f"Шарды ({len(lines)} из {bot.shard_count})", value="\n".join(lines) or "—", inline=False)
+    
     await ctx.send(embed=embed)
     
     # Log command usage
@@ -450,8 +552,28 @@ if __name__ == "__main__":
         logger.error("Discord token not found! Please set DISCORD_TOKEN in config.py or .env file.")
         exit(1)
     
-    # Set up event loop
-    import asyncio
+    # Несколько процессов: каждый запускает свой диапазон шардов
+    if ARGS.processes > 1:
+        if not ARGS.shard_count:
+            logger.error("--processes requires an explicit --shards count.")
+            exit(1)
+        per_process = -(-ARGS.shard_count // ARGS.processes)  # ceil division
+        workers = []
+        for start in range(0, ARGS.shard_count, per_process):
+            end = min(start + per_process, ARGS.shard_count) - 1
+            logger.info(f"Starting process for shards {start}-{end}")
+            workers.append(subprocess.Popen([
+                sys.executable, os.path.abspath(__file__),
+                '--shards', str(ARGS.shard_count),
+                '--shard-ids', f"{start}-{end}"
+            ]))
+        try:
+            for worker in workers:
+                worker.wait()
+        except KeyboardInterrupt:
+            for worker in workers:
+                worker.terminate()
+        exit(0)
     
     async def main():
         async with bot:
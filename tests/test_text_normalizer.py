@@ -0,0 +1,30 @@
+import sys
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent.parent))
+from utils.text_normalizer import normalize_text
+from utils.word_matcher import WordMatcher
+
+
+def matcher(*words):
+    return WordMatcher(normalize_text(word) for word in words)
+
+
+def test_plain_russian_is_not_folded_to_latin():
+    blocked = matcher('eth', 'hot', 'tok')
+    for text in ('это конкретно заметно', 'ответный удар', 'ЗаМеТнО', 'Нет, это не так'):
+        assert normalize_text(text) == text.lower()
+        assert blocked.search(normalize_text(text)) is None
+
+
+def test_mixed_script_words_are_folded():
+    # "nitro" with Cyrillic і and о; "привет" with Latin p and e
+    assert normalize_text('nіtrо') == 'nitro'
+    assert normalize_text('пpивeт') == 'привет'
+    assert matcher('nitro').search(normalize_text('free nіtrо here')) == 'nitro'
+
+
+def test_width_spacing_and_invisible_characters():
+    assert normalize_text('ｎｉｔｒｏ') == 'nitro'
+    assert normalize_text('n\u200bitro') == 'nitro'
+    assert normalize_text('F R E E  nitro') == 'free nitro'
@@ -0,0 +1,76 @@
+from typing import Dict, Optional, Tuple
+
+import discord
+
+import config
+from utils.config_manager import config_manager
+
+LOG_CHANNEL_NAMES = ('mod-logs', 'moderation-logs', 'logs', 'modlogs', 'audit-logs')
+
+_MISSING = object()
+
+
+class AlertChannelResolver:
+    """Picks the channel for alerts/moderation logs once per guild and caches its ID.
+
+    ``kind='alert'`` prefers the guild's alert channel, then its log channel
+    (set with ``setchannel``), then ATTACK_ALERT_CHANNEL_ID and LOG_CHANNEL_ID
+    from config.py; ``kind='log'`` only the log channels (text channels). Both
+    then fall back to a writable channel with a log-like name and finally the
+    system channel.
+    The cache must be invalidated when channels, roles or the bot's member change.
+    """
+
+    def __init__(self):
+        self._cache: Dict[Tuple[int, str], Optional[int]] = {}
+
+    def resolve(self, guild: discord.Guild, kind: str = 'alert') -> Optional[discord.abc.GuildChannel]:
+        key = (guild.id, kind)
+        channel_id = self._cache.get(key, _MISSING)
+        if channel_id is None:
+            return None
+        if channel_id is not _MISSING:
+            channel = guild.get_channel(channel_id)
+            if channel is not None:
+                return channel
+
+        channel = self._find(guild, kind)
+        self._cache[key] = channel.id if channel else None
+        return channel
+
+    def invalidate(self, guild_id: Optional[int] = None):
+        if guild_id is None:
+            self._cache.clear()
+            return
+        for key in [k for k in self._cache if k[0] == guild_id]:
+            del self._cache[key]
+
+    @staticmethod
+    def _configured_ids(guild_id: int, kind: str):
+        log_ids = (config_manager.get(guild_id, 'log_channel_id'), getattr(config, 'LOG_CHANNEL_ID', None))
+        if kind == 'alert':
+            return (config_manager.get(guild_id, 'alert_channel_id'), log_ids[0],
+                    getattr(config, 'ATTACK_ALERT_CHANNEL_ID', None), log_ids[1])
+        return log_ids
+
+    def _find(self, guild: discord.Guild, kind: str):
+        for channel_id in self._configured_ids(guild.id, kind):
+            try:
+                channel = guild.get_channel(int(channel_id)) if channel_id else None
+            except (TypeError, ValueError):
+                channel = None
+            if channel and (kind != 'log' or isinstance(channel, discord.TextChannel)):
+                return channel
+
+        me = guild.me
+        for channel in guild.text_channels:
+            if channel.name.lower() in LOG_CHANNEL_NAMES and channel.permissions_for(me).send_messages:
+                return channel
+
+        if guild.system_channel and guild.system_channel.permissions_for(me).send_messages:
+            return guild.system_channel
+        return None
+
+
+# Global instance
+alert_channel_resolver = AlertChannelResolver()
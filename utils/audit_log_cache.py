@@ -0,0 +1,127 @@
+import asyncio
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Optional, Tuple
+
+import discord
+
+from utils.ttl_set import TTLSet
+
+
+class _GuildAuditLog:
+    __slots__ = ('entries', 'index', 'last_id', 'pending', 'fetch_started')
+
+    def __init__(self):
+        self.entries: 'OrderedDict[int, discord.AuditLogEntry]' = OrderedDict()
+        self.index: Dict[Tuple[discord.AuditLogAction, int], discord.AuditLogEntry] = {}
+        self.last_id = 0
+        self.pending: Optional[asyncio.Task] = None
+        self.fetch_started = 0.0
+
+
+class AuditLogCorrelator:
+    """Matches gateway events (ban, channel delete, ...) to audit-log entries.
+
+    Each guild keeps the recent entries indexed by (action, target_id). On a
+    cache miss the guild's log is refreshed with one paginated fetch of
+    everything newer than the last seen entry. Concurrent misses during a
+    burst wait ``batch_delay`` and share that fetch instead of each calling
+    ``audit_logs(limit=1)``, which raced and could pick up the wrong entry.
+    A refresh pages back until the last seen entry or ``max_age``, so a burst
+    of any size is cached in full; ``max_fetch`` only caps a runaway read.
+    """
+
+    def __init__(self, batch_delay: float = 1.0, max_age: float = 60, max_entries: int = 500,
+                 max_fetch: int = 1000):
+        self.batch_delay = batch_delay
+        self.max_age = timedelta(seconds=max_age)
+        self.max_entries = max_entries
+        self.max_fetch = max_fetch
+        self.fetches = 0
+        self._guilds: Dict[int, _GuildAuditLog] = {}
+        self._claimed = TTLSet(max_age * 2, maxlen=10000)
+
+    def _state(self, guild_id: int) -> _GuildAuditLog:
+        state = self._guilds.get(guild_id)
+        if state is None:
+            state = self._guilds[guild_id] = _GuildAuditLog()
+        return state
+
+    def _lookup(self, state: _GuildAuditLog, action, target_id: int):
+        entry = state.index.get((action, target_id))
+        if entry is None or datetime.now(timezone.utc) - entry.created_at > self.max_age:
+            return None
+        return entry
+
+    async def find(self, guild: discord.Guild, action: discord.AuditLogAction,
+                   target_id: int) -> Optional[discord.AuditLogEntry]:
+        """Returns the recent entry for ``action`` on ``target_id`` (None on a plain leave etc.)."""
+        if not guild.me.guild_permissions.view_audit_log:
+            return None
+        state = self._state(guild.id)
+        entry = self._lookup(state, action, target_id)
+        if entry is not None:
+            return entry
+        called_at = asyncio.get_running_loop().time()
+        # A fetch that was already running when the event arrived may predate
+        # its entry, so at most one more refresh is made in that case.
+        for _ in range(2):
+            if state.pending is None:
+                state.pending = asyncio.create_task(self._refresh(guild, state))
+            try:
+                await asyncio.shield(state.pending)
+            except Exception:
+                return None
+            entry = self._lookup(state, action, target_id)
+            if entry is not None or state.fetch_started >= called_at:
+                return entry
+        return None
+
+    def cached(self, guild_id: int, action: discord.AuditLogAction,
+               target_id: int) -> Optional[discord.AuditLogEntry]:
+        """Like ``find`` but never fetches: the entry if a recent refresh already loaded it."""
+        state = self._guilds.get(guild_id)
+        return self._lookup(state, action, target_id) if state is not None else None
+
+    def claim(self, entry: discord.AuditLogEntry) -> bool:
+        """True the first time an entry is claimed, so one entry is never counted twice."""
+        if entry.id in self._claimed:
+            return False
+        self._claimed.add(entry.id)
+        return True
+
+    async def _refresh(self, guild: discord.Guild, state: _GuildAuditLog):
+        try:
+            # Give the rest of the burst time to land in the audit log
+            await asyncio.sleep(self.batch_delay)
+            state.fetch_started = asyncio.get_running_loop().time()
+            self.fetches += 1
+            cutoff = datetime.now(timezone.utc) - self.max_age
+            fresh = []
+            async for entry in guild.audit_logs(limit=None):
+                if entry.id <= state.last_id or entry.created_at < cutoff:
+                    break
+                fresh.append(entry)
+                if len(fresh) >= self.max_fetch:
+                    break
+            for entry in reversed(fresh):
+                self._add(state, entry)
+        finally:
+            state.pending = None
+
+    def _add(self, state: _GuildAuditLog, entry: discord.AuditLogEntry):
+        if entry.id in state.entries:
+            return
+        state.entries[entry.id] = entry
+        state.last_id = max(state.last_id, entry.id)
+        target_id = getattr(entry.target, 'id', None)
+        if target_id is not None:
+            state.index[(entry.action, target_id)] = entry
+        while len(state.entries) > self.max_entries:
+            _, old = state.entries.popitem(last=False)
+            key = (old.action, getattr(old.target, 'id', None))
+            if state.index.get(key) is old:
+                del state.index[key]
+
+    def forget(self, guild_id: int):
+        self._guilds.pop(guild_id, None)
@@ -0,0 +1,173 @@
+import asyncio
+import logging
+import os
+import tempfile
+from pathlib import Path
+from typing import Iterable, List, Optional, Tuple
+
+from utils.text_normalizer import normalize_text
+from utils.word_matcher import WordMatcher
+
+logger = logging.getLogger('discord_bot')
+
+
+def build_matcher(words: Iterable[str]) -> WordMatcher:
+    """Matcher over the words folded the same way as message text (normalize_text)."""
+    return WordMatcher(normalize_text(word) for word in words)
+
+
+def parse_words(lines: Iterable[str]) -> List[str]:
+    """Stripped, lowercased, non-empty entries in file order, duplicates removed."""
+    return list(dict.fromkeys(w for w in (line.strip().lower() for line in lines) if w))
+
+
+class _Snapshot:
+    __slots__ = ('words', 'matcher', 'stamp')
+
+    def __init__(self, words: Tuple[str, ...], matcher: WordMatcher, stamp: Optional[Tuple[float, int]]):
+        self.words = words
+        self.matcher = matcher
+        self.stamp = stamp
+
+
+class BlockedWordRepository:
+    """Blocked words from a text file (one per line) and the matcher built from them.
+
+    The words and their matcher live in one snapshot object which is replaced
+    with a single assignment, so ``search`` always sees a consistent pair and
+    never waits. Rebuilding (reading the file, folding, compiling the matcher)
+    runs in a worker thread via ``asyncio.to_thread``; for 100k entries that is
+    seconds of work which would otherwise stall message processing.
+
+    ``watch`` polls the file's mtime and reloads it after external edits.
+    ``add``/``remove`` rewrite the file atomically (temp file + ``os.replace``)
+    and are serialized with reloads by one lock.
+    """
+
+    def __init__(self, path: str = 'discord_blocked_words_full.txt', poll_interval: float = 5.0):
+        self.path = Path(path)
+        self.poll_interval = poll_interval
+        self._snapshot = _Snapshot((), WordMatcher(), None)
+        self._lock: Optional[asyncio.Lock] = None
+
+    def __len__(self) -> int:
+        return len(self._snapshot.words)
+
+    @property
+    def words(self) -> Tuple[str, ...]:
+        return self._snapshot.words
+
+    def search(self, text: str) -> Optional[str]:
+        """First blocked word found in already normalized ``text`` or ``None``."""
+        return self._snapshot.matcher.search(text)
+
+    def _get_lock(self) -> asyncio.Lock:
+        # Created lazily: the global instance is built before the event loop exists
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        return self._lock
+
+    def _stamp(self) -> Optional[Tuple[float, int]]:
+        try:
+            stat = self.path.stat()
+        except OSError:
+            return None
+        return stat.st_mtime, stat.st_size
+
+    def _read(self) -> List[str]:
+        try:
+            with self.path.open(encoding='utf-8') as f:
+                return parse_words(f)
+        except FileNotFoundError:
+            return []
+
+    def _write(self, words: List[str]):
+        fd, tmp_path = tempfile.mkstemp(prefix=self.path.name, suffix='.tmp', dir=self.path.parent or '.')
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                f.writelines(word + '\n' for word in words)
+            os.replace(tmp_path, self.path)
+        except BaseException:
+            try:
+                os.unlink(tmp_path)
+            except OSError:
+                pass
+            raise
+
+    def _build(self, words: List[str]) -> _Snapshot:
+        return _Snapshot(tuple(words), build_matcher(words), self._stamp())
+
+    def _load(self) -> _Snapshot:
+        # Stamp before reading: a write that lands meanwhile is picked up by the next poll
+        stamp = self._stamp()
+        words = self._read()
+        return _Snapshot(tuple(words), build_matcher(words), stamp)
+
+    def load(self):
+        """Blocking load of the file (scripts, tests); the bot loads it with ``reload``."""
+        self._snapshot = self._load()
+
+    def changed(self) -> bool:
+        return self._stamp() != self._snapshot.stamp
+
+    async def reload(self) -> bool:
+        """Reloads the file in a worker thread if it changed since the last load."""
+        async with self._get_lock():
+            if not self.changed():
+                return False
+            self._snapshot = await asyncio.to_thread(self._load)
+        logger.info(f"Blocked words reloaded: {len(self)}")
+        return True
+
+    async def watch(self):
+        """Loads the file, then polls it every ``poll_interval`` seconds; run as a task.
+
+        The first load also goes through ``reload``, so building the matcher
+        for a large list never blocks the event loop at startup.
+        """
+        while True:
+            try:
+                await self.reload()
+            except Exception as e:
+                logger.error(f"Error reloading blocked words: {e}")
+            await asyncio.sleep(self.poll_interval)
+
+    async def _update(self, change) -> List[str]:
+        async with self._get_lock():
+            def apply():
+                current = self._read()
+                words, affected = change(current)
+                if affected:
+                    self._write(words)
+                    return affected, self._build(words)
+                return affected, None
+
+            affected, snapshot = await asyncio.to_thread(apply)
+            if snapshot is not None:
+                self._snapshot = snapshot
+        return affected
+
+    async def add(self, words: Iterable[str]) -> List[str]:
+        """Adds words (any number: one from a command or a whole imported list), returns the new ones."""
+        new = parse_words(words)
+
+        def change(current):
+            present = set(current)
+            added = [w for w in new if w not in present]
+            return current + added, added
+
+        return await self._update(change)
+
+    async def remove(self, words: Iterable[str]) -> List[str]:
+        """Removes words, returns those that were in the list."""
+        gone = set(parse_words(words))
+
+        def change(current):
+            removed = [w for w in current if w in gone]
+            return [w for w in current if w not in gone], removed
+
+        return await self._update(change)
+
+
+# Global instance
+blocked_words = BlockedWordRepository()
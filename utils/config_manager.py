@@ -1,33 +1,280 @@
+import asyncio
+import atexit
 import json
+import logging
+import os
+import tempfile
+import threading
 from pathlib import Path
-from typing import Dict, Optional
+from typing import Any, Dict, Optional, Set, Tuple
+
+logger = logging.getLogger('discord_bot')
+
+SAVE_RETRY_DELAY = 30.0  # seconds before retrying a failed save
+
+# Built-in defaults; "defaults" in bot_config.json overrides them for every guild
+DEFAULTS: Dict[str, Any] = {
+    'language': 'ru',
+    'spam_threshold': 5,       # сообщений
+    'spam_window': 10,         # секунд
+    'mention_threshold': 5,    # упоминаний
+    'mention_window': 10,
+    'emoji_threshold': 10,     # эмодзи
+    'emoji_window': 10,
+    'bot_threshold': 3,        # сообщений бота
+    'bot_window': 5,
+    'duplicate_threshold': 6,  # одинаковых сообщений от любых участников
+    'duplicate_window': 30,
+    'nuke_threshold': 3,       # действий
+    'nuke_window': 30,
+    'alert_channel_id': None,
+    'log_channel_id': None,
+}
+# Discord IDs: positive ints (the other numeric fields only need to be >= 0)
+CHANNEL_FIELDS = ('alert_channel_id', 'log_channel_id')
+
+
+def convert_setting(name: str, value: Any) -> Any:
+    """``value`` as the field's type (e.g. "6" from hand-edited JSON -> 6); ValueError if it does not fit.
+
+    Thresholds and windows are ints >= 0, channel IDs positive ints, the
+    language a non-empty string. ``None`` (inherit) passes through.
+    """
+    if value is None:
+        return None
+    if name == 'language':
+        if not isinstance(value, str) or not value:
+            raise ValueError(f"{name} must be a non-empty string, got {value!r}")
+        return value
+    if isinstance(value, bool) or (isinstance(value, float) and not value.is_integer()):
+        raise ValueError(f"{name} must be an integer, got {value!r}")
+    try:
+        number = int(value)
+    except (TypeError, ValueError):
+        raise ValueError(f"{name} must be an integer, got {value!r}") from None
+    if number < (1 if name in CHANNEL_FIELDS else 0):
+        raise ValueError(f"{name} is out of range: {value!r}")
+    return number
+
+
+class GuildSettings:
+    """Settings of one guild. ``None`` means "not set here", i.e. inherit the default.
+
+    Values are converted with ``convert_setting``; invalid ones are logged and
+    dropped. Keys this version does not know about are kept in ``extra`` and
+    written back unchanged.
+    """
+
+    __slots__ = tuple(DEFAULTS) + ('extra',)
+
+    def __init__(self, data: Optional[Dict[str, Any]] = None):
+        data = dict(data or {})
+        for name in DEFAULTS:
+            value = data.pop(name, None)
+            try:
+                value = convert_setting(name, value)
+            except ValueError as e:
+                logger.warning(f"Ignoring invalid setting in config: {e}")
+                value = None
+            setattr(self, name, value)
+        self.extra = data
+
+    def to_dict(self) -> Dict[str, Any]:
+        data = {name: getattr(self, name) for name in DEFAULTS if getattr(self, name) is not None}
+        data.update(self.extra)
+        return data
+
 
 class ConfigManager:
-    def __init__(self, config_file: str = 'bot_config.json'):
+    """Per-guild settings kept in memory and written to ``bot_config.json`` behind.
+
+    Reads never touch the disk. ``set`` changes the in-memory object and
+    schedules a save ``save_delay`` seconds later, so a burst of changes costs
+    one write. The write happens on a timer thread into a temp file that then
+    replaces the config with ``os.replace``, so a crash never leaves a
+    half-written file. Writes are serialized, so an older snapshot never
+    replaces a newer one; a failed write is logged and retried. Pending
+    changes are flushed at exit.
+
+    Several bot processes (``--processes``) share the file: a save re-reads
+    it and writes only the fields changed here on top, and ``watch`` reloads
+    it after another process saved. Fields changed here but not yet saved
+    win over the file.
+    """
+
+    def __init__(self, config_file: str = 'bot_config.json', save_delay: float = 1.0):
         self.config_file = Path(config_file)
-        self.config = self._load_config()
-    
-    def _load_config(self) -> Dict:
-        if not self.config_file.exists():
-            return {}
+        self.save_delay = save_delay
+        self._stamp = self._file_stamp()
+        self._parse(self._load_config())
+        # Bumped on every change so caches built from the settings know to rebuild
+        self.version = 0
+        # (guild_id or None for the defaults, field) changed here and not saved yet
+        self._dirty: Set[Tuple[Optional[int], str]] = set()
+        self._lock = threading.Lock()
+        # Held from snapshot to os.replace: saves land on disk in snapshot order
+        self._write_lock = threading.Lock()
+        self._timer: Optional[threading.Timer] = None
+        atexit.register(self.flush)
+
+    def _parse(self, data: Dict):
+        self.config = dict(data)
+        # Overrides of the built-in DEFAULTS for all guilds
+        self.defaults = GuildSettings(self.config.pop('defaults', {}))
+        self.guilds: Dict[int, GuildSettings] = {
+            int(guild_id): GuildSettings(values)
+            for guild_id, values in self.config.pop('guilds', {}).items()
+        }
+
+    def _file_stamp(self) -> Optional[Tuple[float, int]]:
+        try:
+            stat = self.config_file.stat()
+        except OSError:
+            return None
+        return stat.st_mtime, stat.st_size
+
+    def _read_file(self) -> Optional[Dict]:
+        """File contents, or ``None`` when it is missing or unreadable."""
         try:
             with open(self.config_file, 'r', encoding='utf-8') as f:
-                return json.load(f)
+                data = json.load(f)
         except (json.JSONDecodeError, IOError):
-            return {}
-    
+            return None
+        return data if isinstance(data, dict) else None
+
+    def _load_config(self) -> Dict:
+        return self._read_file() or {}
+
+    def _settings(self, guild_id: Optional[int]) -> GuildSettings:
+        return self.defaults if guild_id is None else self.guild(guild_id)
+
+    def _adopt(self, data: Dict):
+        # Called with the lock held: takes the file's state, keeps unsaved local changes on top
+        pending = {key: getattr(self._settings(key[0]), key[1]) for key in self._dirty}
+        self._parse(data)
+        for (guild_id, name), value in pending.items():
+            setattr(self._settings(guild_id), name, value)
+        self.version += 1
+
+    def _snapshot(self) -> Dict:
+        data = dict(self.config)
+        data['defaults'] = self.defaults.to_dict()
+        guilds = {str(guild_id): settings.to_dict() for guild_id, settings in self.guilds.items()}
+        data['guilds'] = {guild_id: values for guild_id, values in guilds.items() if values}
+        return data
+
     def _save_config(self):
-        with open(self.config_file, 'w', encoding='utf-8') as f:
-            json.dump(self.config, f, ensure_ascii=False, indent=4)
-    
+        with self._write_lock:
+            # Other processes may have saved since our last read: merge onto their version
+            on_disk = self._read_file()
+            with self._lock:
+                self._timer = None
+                if on_disk is not None:
+                    self._adopt(on_disk)
+                data = self._snapshot()
+                dirty, self._dirty = self._dirty, set()
+            tmp_path = None
+            try:
+                fd, tmp_path = tempfile.mkstemp(prefix=self.config_file.name, suffix='.tmp',
+                                                dir=self.config_file.parent or '.')
+                with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                    json.dump(data, f, ensure_ascii=False, indent=4)
+                os.replace(tmp_path, self.config_file)
+                self._stamp = self._file_stamp()
+            except Exception as e:
+                logger.error(f"Error saving {self.config_file}, will retry: {e}")
+                if tmp_path is not None:
+                    try:
+                        os.unlink(tmp_path)
+                    except OSError:
+                        pass
+                # Keep the change and try again later
+                with self._lock:
+                    self._dirty |= dirty
+                    self._schedule_save(SAVE_RETRY_DELAY)
+
+    def _schedule_save(self, delay: Optional[float] = None):
+        # Called with the lock held
+        if self._timer is None:
+            self._timer = threading.Timer(self.save_delay if delay is None else delay, self._save_config)
+            self._timer.daemon = True
+            self._timer.start()
+
+    def flush(self):
+        """Writes pending changes now instead of waiting for the timer.
+
+        Also waits for a timer save that is already writing.
+        """
+        with self._lock:
+            timer, self._timer = self._timer, None
+        if timer is not None:
+            timer.cancel()
+            self._save_config()
+        else:
+            with self._write_lock:
+                pass
+
+    def refresh(self) -> bool:
+        """Reloads the file if another process changed it since our last read or write."""
+        with self._write_lock:
+            stamp = self._file_stamp()
+            if stamp == self._stamp:
+                return False
+            data = self._read_file()
+            self._stamp = stamp
+            if data is None:
+                return False
+            with self._lock:
+                self._adopt(data)
+        logger.info(f"{self.config_file} changed on disk, settings reloaded")
+        return True
+
+    async def watch(self, interval: float = 5.0):
+        """Calls ``refresh`` every ``interval`` seconds in a worker thread; run as a task."""
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                await asyncio.to_thread(self.refresh)
+            except Exception as e:
+                logger.error(f"Error reloading {self.config_file}: {e}")
+
+    def guild(self, guild_id: int) -> GuildSettings:
+        """Returns the guild's own settings object (only explicitly set values)."""
+        settings = self.guilds.get(guild_id)
+        if settings is None:
+            settings = self.guilds[guild_id] = GuildSettings()
+        return settings
+
+    def get(self, guild_id: Optional[int], name: str) -> Any:
+        """Effective value for a guild: its own setting, else the configured, else the built-in default."""
+        settings = self.guilds.get(guild_id) if guild_id is not None else None
+        value = getattr(settings, name) if settings is not None else None
+        if value is None:
+            value = getattr(self.defaults, name)
+        return DEFAULTS[name] if value is None else value
+
+    def set(self, guild_id: Optional[int], **values):
+        """Sets values for a guild (or the defaults with ``guild_id=None``); ``None`` resets to default.
+
+        Raises KeyError for an unknown name and ValueError for a value of the wrong type.
+        """
+        for name in values:
+            if name not in DEFAULTS:
+                raise KeyError(name)
+        values = {name: convert_setting(name, value) for name, value in values.items()}
+        with self._lock:
+            settings = self.defaults if guild_id is None else self.guild(guild_id)
+            for name, value in values.items():
+                setattr(settings, name, value)
+                self._dirty.add((guild_id, name))
+            self.version += 1
+            self._schedule_save()
+
     def set_guild_language(self, guild_id: int, language: str):
-        if 'guilds' not in self.config:
-            self.config['guilds'] = {}
-        self.config['guilds'][str(guild_id)] = {'language': language}
-        self._save_config()
-    
+        self.set(guild_id, language=language)
+
     def get_guild_language(self, guild_id: int) -> str:
-        return self.config.get('guilds', {}).get(str(guild_id), {}).get('language', 'ru')
+        return self.get(guild_id, 'language')
 
 # Global instance
 config_manager = ConfigManager()
@@ -0,0 +1,200 @@
+import heapq
+import math
+import re
+import time
+from collections import OrderedDict, deque
+from typing import Dict, FrozenSet, List, Optional
+
+# User, role and channel mentions: raids often vary only these
+_MENTION = re.compile(r'<(?:@[!&]?|#)\d+>')
+# Whitespace and zero-width characters dropped before hashing
+_STRIP = dict.fromkeys(map(ord, ' \t\n\r\x0b\x0c\u00a0\u180e\u200b\u200c\u200d\u2060\u3000\ufeff'))
+
+
+def normalize(text: str) -> str:
+    if '<' in text:
+        text = _MENTION.sub('', text)
+    return text.casefold().translate(_STRIP)
+
+
+def minhash(text: str, size: int = 16, shingle: int = 3) -> List[int]:
+    """Bottom-k MinHash sketch: the ``size`` smallest hashes of the text's character shingles."""
+    shingles = {text[i:i + shingle] for i in range(max(1, len(text) - shingle + 1))}
+    return heapq.nsmallest(size, map(hash, shingles))
+
+
+def similarity(a: FrozenSet[int], b: FrozenSet[int]) -> float:
+    """Jaccard similarity estimated from two sketches."""
+    return len(a & b) / len(a | b)
+
+
+class _Cluster:
+    __slots__ = ('sketch', 'keys', 'hits')
+
+    def __init__(self, sketch: FrozenSet[int], keys: List[int], max_hits: int):
+        self.sketch = sketch
+        self.keys = keys
+        # (time, author_id) of recent similar messages
+        self.hits: deque = deque(maxlen=max_hits)
+
+
+class _GuildState:
+    __slots__ = ('clusters', 'buckets', 'next_id', 'rate', 'rate_time')
+
+    def __init__(self):
+        self.clusters: 'OrderedDict[int, _Cluster]' = OrderedDict()
+        self.buckets: Dict[int, List[int]] = {}
+        self.next_id = 0
+        # Exponentially decayed messages per second of the whole guild
+        self.rate = 0.0
+        self.rate_time = 0.0
+
+
+class DuplicateDetector:
+    """Detects raids: identical and near-identical risky messages from several accounts.
+
+    Messages are normalized (mentions removed, case-folded, whitespace and
+    zero-width stripped)
+    and reduced to a MinHash sketch of their character shingles. The
+    ``bands`` smallest hashes index clusters (each remembers the last few
+    clusters that had it), and a candidate joins a cluster when the estimated
+    Jaccard similarity is at least ``min_similarity``. A message costs a fixed
+    number of dict lookups and set intersections regardless of how many
+    clusters exist; at most ``max_clusters`` clusters are kept per guild (least
+    recently hit evicted).
+
+    Every message counts toward the guild's activity, but only risky ones
+    (links, mentions, new accounts; decided by the caller) join clusters. A
+    cluster is a raid when it has the threshold's worth of messages in the
+    window from at least ``min_authors`` accounts. The threshold grows with
+    traffic: at least ``activity_share`` of the guild's messages in the window,
+    so a phrase a busy chat repeats is not a raid.
+    """
+
+    def __init__(self, max_clusters: int = 1000, min_similarity: float = 0.6, min_length: int = 10,
+                 max_chars: int = 512, sketch_size: int = 16, bands: int = 4, bucket_size: int = 4,
+                 min_authors: int = 3, activity_share: float = 0.1, activity_period: float = 60.0,
+                 max_hits: int = 1000):
+        self.max_clusters = max_clusters
+        self.min_similarity = min_similarity
+        self.min_length = min_length
+        self.max_chars = max_chars
+        self.sketch_size = sketch_size
+        self.bands = bands
+        self.bucket_size = bucket_size
+        self.min_authors = min_authors
+        self.activity_share = activity_share
+        self.activity_period = activity_period
+        self.max_hits = max_hits
+        self._guilds: Dict[int, _GuildState] = {}
+
+    def __len__(self) -> int:
+        return sum(len(state.clusters) for state in self._guilds.values())
+
+    def _observe(self, state: _GuildState, now: float):
+        elapsed = max(0.0, now - state.rate_time)
+        state.rate = state.rate * math.exp(-elapsed / self.activity_period) + 1 / self.activity_period
+        state.rate_time = now
+
+    def threshold(self, guild_id: int, limit: int, window: float) -> int:
+        """Effective threshold: ``limit`` or ``activity_share`` of the guild's messages per window."""
+        state = self._guilds.get(guild_id)
+        busy = state.rate * window * self.activity_share if state is not None else 0.0
+        return max(limit, math.ceil(busy))
+
+    def check(self, guild_id: int, text: str, author_id: int, limit: int, window: float,
+              risky: bool = True, now: Optional[float] = None) -> bool:
+        """Records the message; True when it belongs to a raid (see the class docstring)."""
+        if limit <= 0:
+            return False
+        now = time.monotonic() if now is None else now
+        state = self._guilds.get(guild_id)
+        if state is None:
+            state = self._guilds[guild_id] = _GuildState()
+        self._observe(state, now)
+        if not risky:
+            return False
+        text = normalize(text[:self.max_chars])
+        if len(text) < self.min_length:
+            return False
+        hashes = minhash(text, self.sketch_size)
+        sketch = frozenset(hashes)
+
+        cluster_id = self._match(state, sketch, hashes)
+        if cluster_id is None:
+            cluster_id = self._add(state, sketch, hashes[:self.bands])
+        self._index(state, cluster_id)
+        hits = state.clusters[cluster_id].hits
+        hits.append((now, author_id))
+        while now - hits[0][0] > window:
+            hits.popleft()
+
+        if len(hits) < self.threshold(guild_id, limit, window):
+            return False
+        return len({author for _, author in hits}) >= self.min_authors
+
+    def _match(self, state: _GuildState, sketch: FrozenSet[int], hashes: List[int]) -> Optional[int]:
+        best_id, best = None, self.min_similarity
+        seen = set()
+        for key in hashes[:self.bands]:
+            for cluster_id in state.buckets.get(key, ()):
+                if cluster_id in seen:
+                    continue
+                seen.add(cluster_id)
+                score = similarity(state.clusters[cluster_id].sketch, sketch)
+                if score >= best:
+                    best_id, best = cluster_id, score
+        if best_id is not None:
+            state.clusters.move_to_end(best_id)
+        return best_id
+
+    def _add(self, state: _GuildState, sketch: FrozenSet[int], keys: List[int]) -> int:
+        cluster_id = state.next_id
+        state.next_id += 1
+        state.clusters[cluster_id] = _Cluster(sketch, keys, self.max_hits)
+        while len(state.clusters) > self.max_clusters:
+            self._drop(state, *state.clusters.popitem(last=False))
+        return cluster_id
+
+    def _index(self, state: _GuildState, cluster_id: int):
+        # Puts the cluster first in its buckets so an ongoing flood is never pushed out
+        for key in state.clusters[cluster_id].keys:
+            bucket = state.buckets.get(key)
+            if bucket is None:
+                state.buckets[key] = [cluster_id]
+                continue
+            if bucket[0] == cluster_id:
+                continue
+            if cluster_id in bucket:
+                bucket.remove(cluster_id)
+            bucket.insert(0, cluster_id)
+            del bucket[self.bucket_size:]
+
+    @staticmethod
+    def _drop(state: _GuildState, cluster_id: int, cluster: _Cluster):
+        for key in cluster.keys:
+            bucket = state.buckets.get(key)
+            if bucket and cluster_id in bucket:
+                bucket.remove(cluster_id)
+                if not bucket:
+                    del state.buckets[key]
+
+    def purge(self, max_age: float, now: Optional[float] = None) -> int:
+        """Drops clusters not hit for ``max_age`` seconds, returns how many."""
+        now = time.monotonic() if now is None else now
+        removed = 0
+        for guild_id in list(self._guilds):
+            state = self._guilds[guild_id]
+            while state.clusters:
+                cluster_id, cluster = next(iter(state.clusters.items()))
+                if cluster.hits and now - cluster.hits[-1][0] <= max_age:
+                    break
+                del state.clusters[cluster_id]
+                self._drop(state, cluster_id, cluster)
+                removed += 1
+            if not state.clusters and now - state.rate_time > max_age:
+                del self._guilds[guild_id]
+        return removed
+
+    def forget(self, guild_id: int):
+        self._guilds.pop(guild_id, None)
@@ -0,0 +1,137 @@
+import asyncio
+import logging
+import time
+from bisect import bisect_left
+from collections import Counter, deque
+from typing import Awaitable, Callable, Dict, Hashable, List, Optional, Sequence, Set, Tuple
+
+logger = logging.getLogger('discord_bot')
+
+# Upper bucket bounds in milliseconds; the last bucket is everything above
+LATENCY_BUCKETS_MS = (50, 100, 250, 500, 1000, 2500, 5000, 10000)
+
+
+class LatencyHistogram:
+    """Fixed-bucket histogram of durations: constant memory, percentiles by bucket bound."""
+
+    def __init__(self, bounds: Sequence[float] = LATENCY_BUCKETS_MS):
+        self.bounds = tuple(bounds)
+        self.counts = [0] * (len(self.bounds) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def __len__(self) -> int:
+        return len(self.counts)
+
+    def record(self, seconds: float):
+        ms = max(0.0, seconds * 1000)
+        self.counts[bisect_left(self.bounds, ms)] += 1
+        self.count += 1
+        self.total += ms
+        if ms > self.max:
+            self.max = ms
+
+    def percentile(self, p: float) -> Optional[float]:
+        """Upper bound (ms) of the bucket holding the ``p``-th percentile; the maximum for the last bucket."""
+        if not self.count:
+            return None
+        rank = p / 100 * self.count
+        seen = 0
+        for i, n in enumerate(self.counts):
+            seen += n
+            if n and seen >= rank:
+                return min(self.bounds[i], self.max) if i < len(self.bounds) else self.max
+        return self.max
+
+    @property
+    def mean(self) -> Optional[float]:
+        return self.total / self.count if self.count else None
+
+
+class RestSpend:
+    """REST calls made per guild in the last ``window`` seconds, by route ("timeout", "delete", ...)."""
+
+    def __init__(self, window: float = 60.0, maxlen: int = 1000):
+        self.window = window
+        self.maxlen = maxlen
+        self._calls: Dict[int, deque] = {}
+
+    def __len__(self) -> int:
+        return len(self._calls)
+
+    def spend(self, guild_id: int, route: str, now: Optional[float] = None):
+        now = time.monotonic() if now is None else now
+        calls = self._calls.get(guild_id)
+        if calls is None:
+            calls = self._calls[guild_id] = deque(maxlen=self.maxlen)
+        calls.append((now, route))
+
+    def _trim(self, calls: deque, now: float):
+        while calls and now - calls[0][0] > self.window:
+            calls.popleft()
+
+    def recent(self, guild_id: int, now: Optional[float] = None) -> Counter:
+        """Calls per route within the window."""
+        now = time.monotonic() if now is None else now
+        calls = self._calls.get(guild_id)
+        if not calls:
+            return Counter()
+        self._trim(calls, now)
+        return Counter(route for _, route in calls)
+
+    def purge(self, now: Optional[float] = None) -> int:
+        """Drops guilds without calls in the window, returns how many."""
+        now = time.monotonic() if now is None else now
+        removed = 0
+        for guild_id in list(self._calls):
+            calls = self._calls[guild_id]
+            self._trim(calls, now)
+            if not calls:
+                del self._calls[guild_id]
+                removed += 1
+        return removed
+
+    def forget(self, guild_id: int):
+        self._calls.pop(guild_id, None)
+
+
+class NotificationCoalescer:
+    """Collects notifications per key and delivers each key's batch once, ``delay`` seconds after its first item.
+
+    ``add`` never waits: the first item for a key starts a task that sleeps
+    and then calls ``send(target, items)``; items added meanwhile join the
+    same batch. A raid of N users in one channel becomes one message.
+    """
+
+    def __init__(self, send: Callable[[object, List], Awaitable], delay: float = 2.0):
+        self.send = send
+        self.delay = delay
+        self._pending: Dict[Hashable, Tuple[object, List]] = {}
+        self._tasks: Set[asyncio.Task] = set()
+
+    def __len__(self) -> int:
+        return len(self._pending)
+
+    def add(self, key: Hashable, target, item):
+        batch = self._pending.get(key)
+        if batch is not None:
+            batch[1].append(item)
+            return
+        self._pending[key] = (target, [item])
+        task = asyncio.create_task(self._deliver(key))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _deliver(self, key: Hashable):
+        await asyncio.sleep(self.delay)
+        target, items = self._pending.pop(key)
+        try:
+            await self.send(target, items)
+        except Exception as e:
+            logger.error(f"Error sending coalesced notification ({len(items)} items): {e}")
+
+    def cancel(self):
+        for task in list(self._tasks):
+            task.cancel()
+        self._pending.clear()
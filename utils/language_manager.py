@@ -1,47 +1,134 @@
 import json
+import logging
+import threading
+import time
+from collections import OrderedDict
 from pathlib import Path
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Optional, Tuple
+
+logger = logging.getLogger('discord_bot')
+
+def flatten(data: Dict[str, Any], prefix: str = '') -> Dict[str, Any]:
+    """Turns nested locale dicts into one dict keyed by dotted keys (sections are kept too)."""
+    flat: Dict[str, Any] = {}
+    stack = [(prefix, data)]
+    while stack:
+        path, node = stack.pop()
+        for k, v in node.items():
+            key = f"{path}{k}"
+            flat[key] = v
+            if isinstance(v, dict):
+                stack.append((f"{key}.", v))
+    return flat
 
 class LanguageManager:
-    def __init__(self, default_lang: str = 'ru'):
+    def __init__(self, default_lang: str = 'ru', cache_size: int = 1024, reload_interval: Optional[float] = 5.0):
         self.languages: Dict[str, Dict[str, Any]] = {}
         self.default_lang = default_lang
         self.locales_dir = Path(__file__).parent.parent / 'locales'
+        self.cache_size = cache_size
+        self.reload_interval = reload_interval
+        # Per-language flat table with the default language already merged in,
+        # so a lookup (fallback included) is a single dict hit
+        self._tables: Dict[str, Dict[str, Any]] = {}
+        self._formatted: 'OrderedDict[Tuple, str]' = OrderedDict()
+        self._mtimes: Dict[Path, float] = {}
+        self._lock = threading.Lock()
         self.load_languages()
+        if reload_interval:
+            threading.Thread(target=self._watch, name='locale-reload', daemon=True).start()
 
     def load_languages(self):
         if not self.locales_dir.exists():
             self.locales_dir.mkdir(parents=True)
             return
 
+        languages = dict(self.languages)
+        mtimes = {}
         for lang_file in self.locales_dir.glob('*.json'):
             lang_code = lang_file.stem
             try:
+                mtimes[lang_file] = lang_file.stat().st_mtime
                 with open(lang_file, 'r', encoding='utf-8') as f:
-                    self.languages[lang_code] = json.load(f)
+                    languages[lang_code] = json.load(f)
             except (json.JSONDecodeError, IOError) as e:
+                # A broken file keeps its previously loaded version
                 print(f"Error loading language {lang_code}: {e}")
+        self._mtimes = mtimes
+        self.languages = languages
+        self._rebuild()
+
+    def _rebuild(self):
+        default = flatten(self.languages.get(self.default_lang, {}))
+        tables = {lang: {**default, **flatten(data)} for lang, data in self.languages.items()}
+        tables[self.default_lang] = default
+        with self._lock:
+            # Swapped together: readers see either the old or the new table, never a mix
+            self._tables = tables
+            self._formatted = OrderedDict()
+
+    def _changed(self) -> bool:
+        try:
+            current = {path: path.stat().st_mtime for path in self.locales_dir.glob('*.json')}
+        except OSError:
+            return False
+        return current != self._mtimes
+
+    def reload_if_changed(self) -> bool:
+        """Reloads locales/*.json when a file was added, removed or modified."""
+        if not self._changed():
+            return False
+        self.load_languages()
+        return True
+
+    def _watch(self):
+        while True:
+            time.sleep(self.reload_interval)
+            try:
+                if self.reload_if_changed():
+                    logger.info("Locales reloaded")
+            except Exception as e:
+                logger.error(f"Error reloading locales: {e}")
 
     def get(self, key: str, lang: Optional[str] = None, **kwargs) -> str:
         lang = lang or self.default_lang
-        keys = key.split('.')
-        
-        try:
-            value = self.languages.get(lang, self.languages[self.default_lang])
-            for k in keys:
-                value = value[k]
-            
-            if isinstance(value, str) and kwargs:
-                return value.format(**kwargs)
+        tables = self._tables
+        table = tables.get(lang) or tables.get(self.default_lang, {})
+        value = table.get(key)
+        if value is None:
+            return f"[[{key}]]"  # Return key if not found
+        if not (isinstance(value, str) and kwargs):
             return value
+
+        try:
+            cache_key = (lang, key, tuple(sorted(kwargs.items())))
+            hash(cache_key)
+        except TypeError:
+            cache_key = None
+        formatted = self._formatted
+        if cache_key is not None and self.cache_size:
+            text = formatted.get(cache_key)
+            if text is not None:
+                formatted.move_to_end(cache_key)
+                return text
+
+        try:
+            text = value.format(**kwargs)
         except (KeyError, TypeError):
             if lang != self.default_lang:
                 return self.get(key, self.default_lang, **kwargs)
-            return f"[[{key}]]"  # Return key if not found
+            return f"[[{key}]]"
+        if cache_key is not None and self.cache_size:
+            with self._lock:
+                formatted[cache_key] = text
+                while len(formatted) > self.cache_size:
+                    formatted.popitem(last=False)
+        return text
 
     def set_language(self, lang: str) -> bool:
         if lang in self.languages:
             self.default_lang = lang
+            self._rebuild()
             return True
         return False
 
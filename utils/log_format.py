@@ -0,0 +1,46 @@
+import copy
+import json
+import logging
+from logging.handlers import QueueHandler
+from datetime import datetime, timezone
+
+# Pass with ``extra={...}``; written as top-level JSON fields when present
+CONTEXT_FIELDS = ('guild_id', 'user_id', 'action')
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line: time, level, logger, message and the CONTEXT_FIELDS set on the record."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            'time': datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+        }
+        for field in CONTEXT_FIELDS:
+            value = getattr(record, field, None)
+            if value is not None:
+                entry[field] = value
+        if record.exc_info:
+            entry['exc'] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            entry['exc'] = record.exc_text
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class StructuredQueueHandler(QueueHandler):
+    """QueueHandler that keeps extras and the traceback apart from the message.
+
+    The stock ``prepare`` folds the traceback into ``msg``; here it goes to
+    ``exc_text``, which both the text and the JSON formatter render.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
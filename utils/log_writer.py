@@ -0,0 +1,92 @@
+import atexit
+import queue
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import Optional, TextIO, Union
+
+_STOP = object()
+
+
+class BatchedLogWriter:
+    """Appends lines to a file (or stream) from a background thread.
+
+    ``write`` only puts the line on a queue, so callers on the event loop never
+    block on disk I/O. The thread writes a batch once ``batch_size`` lines are
+    queued or ``flush_interval`` seconds have passed, and drains the queue on
+    ``close`` (also registered with ``atexit``).
+    """
+
+    def __init__(self, target: Union[str, Path, TextIO], batch_size: int = 100, flush_interval: float = 1.0):
+        self.target = target
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._queue: 'queue.Queue' = queue.Queue()
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name=f"log-writer:{target}", daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    def write(self, line: str):
+        if self._closed:
+            return
+        self._queue.put(line)
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Blocks until everything queued so far is written."""
+        if self._closed:
+            return True
+        done = threading.Event()
+        self._queue.put(done)
+        return done.wait(timeout)
+
+    def close(self):
+        if self._closed:
+            return
+        self._closed = True
+        self._queue.put(_STOP)
+        self._thread.join()
+
+    def _write_batch(self, lines):
+        if not lines:
+            return
+        data = ''.join(line + '\n' for line in lines)
+        try:
+            if isinstance(self.target, (str, Path)):
+                with open(self.target, 'a', encoding='utf-8') as f:
+                    f.write(data)
+            else:
+                self.target.write(data)
+                self.target.flush()
+        except Exception as e:
+            print(f"Error writing log batch to {self.target}: {e}", file=sys.stderr)
+        lines.clear()
+
+    def _run(self):
+        batch = []
+        deadline = None
+        while True:
+            timeout = None if deadline is None else max(0.0, deadline - time.monotonic())
+            try:
+                item = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                self._write_batch(batch)
+                deadline = None
+                continue
+
+            if item is _STOP:
+                self._write_batch(batch)
+                return
+            if isinstance(item, threading.Event):
+                self._write_batch(batch)
+                deadline = None
+                item.set()
+                continue
+
+            batch.append(item)
+            if deadline is None:
+                deadline = time.monotonic() + self.flush_interval
+            if len(batch) >= self.batch_size:
+                self._write_batch(batch)
+                deadline = None
@@ -0,0 +1,76 @@
+import asyncio
+import heapq
+import itertools
+import time
+from typing import Dict, Hashable, List, Optional, Tuple
+
+
+class MuteScheduler:
+    """Min-heap of mute deadlines (unix time) that sleeps until the earliest one.
+
+    ``schedule`` is O(log N). ``cancel`` is O(1): the heap entry is left in
+    place and skipped when it surfaces, and the heap is rebuilt once stale
+    entries outnumber live ones. Heap entries carry a sequence number so keys
+    (which may mix ``None`` and strings) are never compared.
+    """
+
+    def __init__(self):
+        self._heap: List[Tuple[float, int, Hashable]] = []
+        self._seq = itertools.count()
+        self._deadlines: Dict[Hashable, float] = {}
+        self._wakeup = asyncio.Event()
+
+    def __len__(self) -> int:
+        return len(self._deadlines)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._deadlines
+
+    def keys(self) -> List[Hashable]:
+        return list(self._deadlines)
+
+    def schedule(self, key: Hashable, deadline: float):
+        earliest = self.next_deadline()
+        self._deadlines[key] = deadline
+        heapq.heappush(self._heap, (deadline, next(self._seq), key))
+        if earliest is None or deadline < earliest:
+            self._wakeup.set()
+
+    def cancel(self, key: Hashable):
+        if self._deadlines.pop(key, None) is not None and len(self._heap) > 2 * len(self._deadlines) + 64:
+            self._heap = [(d, next(self._seq), k) for k, d in self._deadlines.items()]
+            heapq.heapify(self._heap)
+
+    def _drop_stale(self):
+        heap = self._heap
+        while heap and self._deadlines.get(heap[0][2]) != heap[0][0]:
+            heapq.heappop(heap)
+
+    def next_deadline(self) -> Optional[float]:
+        self._drop_stale()
+        return self._heap[0][0] if self._heap else None
+
+    def pop_due(self, now: Optional[float] = None) -> List[Hashable]:
+        now = time.time() if now is None else now
+        due = []
+        while True:
+            self._drop_stale()
+            if not self._heap or self._heap[0][0] > now:
+                return due
+            _, _, key = heapq.heappop(self._heap)
+            del self._deadlines[key]
+            due.append(key)
+
+    async def wait_due(self) -> List[Hashable]:
+        """Sleeps until at least one deadline has passed and returns the due keys."""
+        while True:
+            due = self.pop_due()
+            if due:
+                return due
+            self._wakeup.clear()
+            deadline = self.next_deadline()
+            timeout = None if deadline is None else max(0.0, deadline - time.time())
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
@@ -0,0 +1,113 @@
+import json
+import sqlite3
+from pathlib import Path
+from typing import Dict, List, Optional
+
+# Same ``until`` format as the old muted_users.json (UTC). Strings in this
+# format sort like the dates they encode, so the index on ``until`` is usable.
+UNTIL_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS mutes (
+    guild_id TEXT NOT NULL DEFAULT '',
+    user_id  TEXT NOT NULL,
+    username TEXT,
+    until    TEXT,
+    reason   TEXT,
+    PRIMARY KEY (guild_id, user_id)
+);
+CREATE INDEX IF NOT EXISTS mutes_until ON mutes (until);
+"""
+
+
+class MuteStore:
+    """Active mutes in SQLite, one row per (guild_id, user_id)."""
+
+    def __init__(self, db_file: str = 'muted_users.db', legacy_file: Optional[str] = 'muted_users.json'):
+        self.db_file = Path(db_file)
+        self.conn = sqlite3.connect(self.db_file)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('PRAGMA synchronous=NORMAL')
+        self.conn.executescript(_SCHEMA)
+        if legacy_file:
+            self.migrate_json(Path(legacy_file))
+
+    @staticmethod
+    def _guild_key(guild_id) -> str:
+        return str(guild_id) if guild_id is not None else ''
+
+    @staticmethod
+    def _to_dict(row: sqlite3.Row) -> Dict:
+        mute = dict(row)
+        mute['guild_id'] = mute['guild_id'] or None
+        return mute
+
+    def migrate_json(self, legacy_file: Path) -> int:
+        """Imports the old muted_users.json and renames it so it is imported only once."""
+        if not legacy_file.exists():
+            return 0
+        try:
+            with legacy_file.open(encoding='utf-8') as f:
+                mutes = json.load(f)
+        except (json.JSONDecodeError, IOError):
+            mutes = []
+        rows = [
+            (self._guild_key(m.get('guild_id')), str(m['user_id']), m.get('username'), m.get('until'), m.get('reason'))
+            for m in mutes if isinstance(m, dict) and m.get('user_id') is not None
+        ]
+        with self.conn:
+            self.conn.executemany(
+                'INSERT OR REPLACE INTO mutes (guild_id, user_id, username, until, reason) VALUES (?, ?, ?, ?, ?)',
+                rows
+            )
+        legacy_file.rename(legacy_file.with_name(legacy_file.name + '.migrated'))
+        return len(rows)
+
+    def add(self, user_id, username: str, until: str, reason: str, guild_id=None):
+        with self.conn:
+            self.conn.execute(
+                'INSERT OR REPLACE INTO mutes (guild_id, user_id, username, until, reason) VALUES (?, ?, ?, ?, ?)',
+                (self._guild_key(guild_id), str(user_id), username, until, reason)
+            )
+
+    def remove(self, user_id, guild_id=None) -> int:
+        with self.conn:
+            if guild_id is None:
+                cur = self.conn.execute('DELETE FROM mutes WHERE user_id = ?', (str(user_id),))
+            else:
+                cur = self.conn.execute(
+                    'DELETE FROM mutes WHERE guild_id = ? AND user_id = ?',
+                    (self._guild_key(guild_id), str(user_id))
+                )
+        return cur.rowcount
+
+    def remove_expired(self, user_id, guild_id, now: str) -> int:
+        """Deletes the mute only if it is still expired, i.e. was not renewed meanwhile."""
+        with self.conn:
+            cur = self.conn.execute(
+                'DELETE FROM mutes WHERE guild_id = ? AND user_id = ? AND until <= ?',
+                (self._guild_key(guild_id), str(user_id), now)
+            )
+        return cur.rowcount
+
+    def get(self, user_id, guild_id=None) -> Optional[Dict]:
+        row = self.conn.execute(
+            'SELECT * FROM mutes WHERE guild_id = ? AND user_id = ?',
+            (self._guild_key(guild_id), str(user_id))
+        ).fetchone()
+        return self._to_dict(row) if row else None
+
+    def expired(self, now: str) -> List[Dict]:
+        """Mutes with ``until <= now`` (``now`` in UNTIL_FORMAT)."""
+        rows = self.conn.execute('SELECT * FROM mutes WHERE until <= ? ORDER BY until', (now,)).fetchall()
+        return [self._to_dict(row) for row in rows]
+
+    def all(self) -> List[Dict]:
+        return [self._to_dict(row) for row in self.conn.execute('SELECT * FROM mutes')]
+
+    def count(self) -> int:
+        return self.conn.execute('SELECT COUNT(*) FROM mutes').fetchone()[0]
+
+    def close(self):
+        self.conn.close()
@@ -0,0 +1,159 @@
+import asyncio
+import logging
+from typing import Dict, Iterable, List, Optional
+
+import discord
+
+import config
+
+logger = logging.getLogger('discord_bot')
+
+# Overwrite values applied to every channel for the muted role
+MUTED_PERMISSIONS = dict(send_messages=False, speak=False, add_reactions=False, connect=False)
+
+
+class MutedRoleProvisioner:
+    """Creates the muted role and its channel overwrites, one pipeline for all guilds.
+
+    Up to ``guild_concurrency`` guilds are provisioned at once and all of them
+    share ``channel_concurrency`` in-flight ``set_permissions`` calls, so a large
+    startup stays well under the global REST limit (discord.py still handles
+    429 retries). Channels whose overwrite already denies everything in
+    ``MUTED_PERMISSIONS`` are skipped. The role ID is cached per guild, and each
+    guild is marked ready on its own as soon as its channels are done.
+    """
+
+    def __init__(self, role_name: str, guild_concurrency: int = 3, channel_concurrency: int = 5):
+        self.role_name = role_name
+        self.guild_concurrency = guild_concurrency
+        self.channel_concurrency = channel_concurrency
+        self._roles: Dict[int, int] = {}
+        self._locks: Dict[int, asyncio.Lock] = {}
+        self._tasks: Dict[int, asyncio.Task] = {}
+        self._ready: Dict[int, asyncio.Event] = {}
+        self._guild_sem: Optional[asyncio.Semaphore] = None
+        self._channel_sem: Optional[asyncio.Semaphore] = None
+
+    def _semaphores(self):
+        # Created lazily so they bind to the running loop
+        if self._guild_sem is None:
+            self._guild_sem = asyncio.Semaphore(self.guild_concurrency)
+            self._channel_sem = asyncio.Semaphore(self.channel_concurrency)
+        return self._guild_sem, self._channel_sem
+
+    def _ready_event(self, guild_id: int) -> asyncio.Event:
+        event = self._ready.get(guild_id)
+        if event is None:
+            event = self._ready[guild_id] = asyncio.Event()
+        return event
+
+    def get(self, guild: discord.Guild) -> Optional[discord.Role]:
+        """Returns the cached muted role without any API call (None if it does not exist)."""
+        role_id = self._roles.get(guild.id)
+        role = guild.get_role(role_id) if role_id else None
+        if role is None:
+            role = discord.utils.get(guild.roles, name=self.role_name)
+            if role is None:
+                self._roles.pop(guild.id, None)
+                return None
+            self._roles[guild.id] = role.id
+        return role
+
+    def is_ready(self, guild_id: int) -> bool:
+        event = self._ready.get(guild_id)
+        return event is not None and event.is_set()
+
+    async def ensure_role(self, guild: discord.Guild) -> Optional[discord.Role]:
+        """Returns the muted role, creating it first if needed."""
+        role = self.get(guild)
+        if role is not None:
+            return role
+        lock = self._locks.setdefault(guild.id, asyncio.Lock())
+        async with lock:
+            # Another caller may have created it while we waited
+            role = self.get(guild)
+            if role is not None:
+                return role
+            try:
+                logger.info(f"Creating muted role in {guild.name}")
+                role = await guild.create_role(
+                    name=self.role_name,
+                    reason="Creating muted role for moderation"
+                )
+            except discord.Forbidden:
+                logger.error(f"Missing permissions to create muted role in {guild.name}")
+                return None
+            except Exception as e:
+                logger.error(f"Error creating muted role in {guild.name}: {e}")
+                return None
+            self._roles[guild.id] = role.id
+            return role
+
+    @staticmethod
+    def overwrite_matches(channel: discord.abc.GuildChannel, role: discord.Role) -> bool:
+        overwrite = channel.overwrites_for(role)
+        return all(getattr(overwrite, name) is value for name, value in MUTED_PERMISSIONS.items())
+
+    async def apply_channel(self, channel: discord.abc.GuildChannel, role: discord.Role) -> bool:
+        """Sets the muted overwrite on one channel, returns True if an API call was made."""
+        if self.overwrite_matches(channel, role):
+            return False
+        _, channel_sem = self._semaphores()
+        # Keep whatever else the overwrite already allows or denies
+        overwrite = channel.overwrites_for(role)
+        overwrite.update(**MUTED_PERMISSIONS)
+        async with channel_sem:
+            try:
+                await channel.set_permissions(role, overwrite=overwrite, reason="Muted role setup")
+            except discord.Forbidden:
+                logger.warning(f"Missing permissions to update {channel.name}")
+                return False
+            except Exception as e:
+                logger.error(f"Error updating channel {channel.name}: {e}")
+                return False
+        return True
+
+    async def _provision(self, guild: discord.Guild) -> Optional[discord.Role]:
+        guild_sem, _ = self._semaphores()
+        async with guild_sem:
+            role = await self.ensure_role(guild)
+            if role is None:
+                return None
+            pending = [channel for channel in guild.channels if not self.overwrite_matches(channel, role)]
+            try:
+                results = await asyncio.gather(*(self.apply_channel(channel, role) for channel in pending))
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Muted role provisioning failed in {guild.name}: {e}")
+                return None
+            updated = sum(results)
+            self._ready_event(guild.id).set()
+            logger.info(
+                f"Muted role ready in {guild.name} (ID: {guild.id}): "
+                f"{updated} channels updated, {len(guild.channels) - len(pending)} already set"
+            )
+            return role
+
+    def provision(self, guild: discord.Guild) -> asyncio.Task:
+        """Starts (or returns the running) provisioning task for one guild."""
+        task = self._tasks.get(guild.id)
+        if task is None or (task.done() and not self.is_ready(guild.id)):
+            task = self._tasks[guild.id] = asyncio.create_task(self._provision(guild))
+        return task
+
+    def provision_all(self, guilds: Iterable[discord.Guild]) -> List[asyncio.Task]:
+        """Starts provisioning for every guild; guilds already done are skipped."""
+        return [self.provision(guild) for guild in guilds]
+
+    def forget(self, guild_id: int):
+        """Drops cached state, e.g. after the role was deleted or the bot left the guild."""
+        self._roles.pop(guild_id, None)
+        self._ready.pop(guild_id, None)
+        task = self._tasks.pop(guild_id, None)
+        if task is not None and not task.done():
+            task.cancel()
+
+
+# Global instance
+muted_role_provisioner = MutedRoleProvisioner(getattr(config, 'MUTED_ROLE_NAME', 'Muted'))
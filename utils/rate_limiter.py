@@ -0,0 +1,74 @@
+import time
+from typing import Dict, Optional, Tuple
+
+
+class _Window:
+    """Ring buffer of the last ``limit`` hit timestamps for one key."""
+
+    __slots__ = ('times', 'pos', 'count', 'last_seen')
+
+    def __init__(self, limit: int):
+        self.times = [0.0] * limit
+        self.pos = 0
+        self.count = 0
+        self.last_seen = 0.0
+
+    def _resize(self, limit: int):
+        # Keeps the most recent hits in chronological order
+        size = len(self.times)
+        kept = min(self.count, size, limit)
+        recent = [self.times[(self.pos - kept + i) % size] for i in range(kept)]
+        self.times = recent + [0.0] * (limit - kept)
+        self.pos = kept % limit
+        self.count = kept
+
+    def hit(self, now: float, limit: int, window: float) -> bool:
+        if len(self.times) != limit:
+            self._resize(limit)
+        self.times[self.pos] = now
+        self.pos = (self.pos + 1) % limit
+        if self.count < limit:
+            self.count += 1
+        self.last_seen = now
+        # After the write, ``pos`` points at the oldest of the last ``limit`` hits
+        return self.count == limit and now - self.times[self.pos] <= window
+
+
+class RateLimiter:
+    """Sliding-window counters keyed by (guild_id, user_id, rule).
+
+    ``hit`` returns True when the key has seen ``limit`` hits within
+    ``window`` seconds. Thresholds are passed on every call, so each guild can
+    use its own; a window created with a different limit is resized on its next
+    hit. Keys idle for longer than ``idle_ttl`` are dropped by ``evict_idle``.
+    """
+
+    def __init__(self, idle_ttl: float = 300):
+        self.idle_ttl = idle_ttl
+        self._windows: Dict[Tuple[int, int, str], _Window] = {}
+
+    def __len__(self) -> int:
+        return len(self._windows)
+
+    def hit(self, guild_id: int, user_id: int, rule: str, limit: int, window: float,
+            now: Optional[float] = None) -> bool:
+        if limit <= 0:
+            return False
+        now = time.monotonic() if now is None else now
+        key = (guild_id, user_id, rule)
+        counter = self._windows.get(key)
+        if counter is None:
+            counter = self._windows[key] = _Window(limit)
+        return counter.hit(now, limit, window)
+
+    def reset(self, guild_id: int, user_id: int, rule: str):
+        self._windows.pop((guild_id, user_id, rule), None)
+
+    def evict_idle(self, now: Optional[float] = None) -> int:
+        """Drops keys without hits for ``idle_ttl`` seconds, returns how many."""
+        now = time.monotonic() if now is None else now
+        cutoff = now - self.idle_ttl
+        idle = [key for key, counter in self._windows.items() if counter.last_seen < cutoff]
+        for key in idle:
+            del self._windows[key]
+        return len(idle)
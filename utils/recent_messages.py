@@ -0,0 +1,64 @@
+from collections import OrderedDict, deque
+from typing import Dict, List
+
+
+class RecentMessages:
+    """Bounded ring of recent (message_id, author_id, timestamp) per channel, grouped by guild.
+
+    Lets enforcement find an offender's last messages across channels without
+    any REST calls. Each channel keeps its last ``per_channel`` messages; a
+    guild keeps its ``max_channels`` most recently active channels.
+    """
+
+    def __init__(self, per_channel: int = 200, max_channels: int = 100):
+        self.per_channel = per_channel
+        self.max_channels = max_channels
+        self._guilds: Dict[int, 'OrderedDict[int, deque]'] = {}
+
+    def __len__(self) -> int:
+        return sum(len(ring) for channels in self._guilds.values() for ring in channels.values())
+
+    def add(self, guild_id: int, channel_id: int, message_id: int, author_id: int, timestamp: float):
+        channels = self._guilds.get(guild_id)
+        if channels is None:
+            channels = self._guilds[guild_id] = OrderedDict()
+        ring = channels.get(channel_id)
+        if ring is None:
+            ring = channels[channel_id] = deque(maxlen=self.per_channel)
+            while len(channels) > self.max_channels:
+                channels.popitem(last=False)
+        else:
+            channels.move_to_end(channel_id)
+        ring.append((message_id, author_id, timestamp))
+
+    def take(self, guild_id: int, author_id: int, since: float) -> Dict[int, List[int]]:
+        """Removes and returns the author's messages newer than ``since``, as {channel_id: [message_id]}."""
+        found: Dict[int, List[int]] = {}
+        for channel_id, ring in self._guilds.get(guild_id, {}).items():
+            ids = [m for m, a, ts in ring if a == author_id and ts >= since]
+            if not ids:
+                continue
+            found[channel_id] = ids
+            kept = [entry for entry in ring if entry[1] != author_id or entry[2] < since]
+            ring.clear()
+            ring.extend(kept)
+        return found
+
+    def purge(self, max_age: float, now: float) -> int:
+        """Drops entries older than ``max_age`` seconds and empty channels, returns how many entries."""
+        removed = 0
+        for guild_id in list(self._guilds):
+            channels = self._guilds[guild_id]
+            for channel_id in list(channels):
+                ring = channels[channel_id]
+                while ring and now - ring[0][2] > max_age:
+                    ring.popleft()
+                    removed += 1
+                if not ring:
+                    del channels[channel_id]
+            if not channels:
+                del self._guilds[guild_id]
+        return removed
+
+    def forget(self, guild_id: int):
+        self._guilds.pop(guild_id, None)
@@ -0,0 +1,52 @@
+from typing import Dict, Optional, Tuple
+
+from utils.config_manager import ConfigManager, config_manager
+
+RULES = ('spam', 'mention', 'emoji', 'bot', 'duplicate')
+
+
+class SpamPolicy:
+    """Effective antispam limits of one guild: ``rules[rule] == (limit, window)``."""
+
+    __slots__ = ('rules', 'nuke_threshold', 'nuke_window')
+
+    def __init__(self, rules: Dict[str, Tuple[int, float]], nuke_threshold: int, nuke_window: float):
+        self.rules = rules
+        self.nuke_threshold = nuke_threshold
+        self.nuke_window = nuke_window
+
+    @classmethod
+    def from_config(cls, manager: ConfigManager, guild_id: Optional[int]) -> 'SpamPolicy':
+        rules = {
+            rule: (manager.get(guild_id, f'{rule}_threshold'), manager.get(guild_id, f'{rule}_window'))
+            for rule in RULES
+        }
+        return cls(rules, manager.get(guild_id, 'nuke_threshold'), manager.get(guild_id, 'nuke_window'))
+
+
+class SpamPolicyTable:
+    """Caches one SpamPolicy per guild, built on first use.
+
+    Any settings change bumps ``ConfigManager.version``, which drops the whole
+    table; guilds are rebuilt lazily on their next message.
+    """
+
+    def __init__(self, manager: ConfigManager = config_manager):
+        self.manager = manager
+        self._version = manager.version
+        self._policies: Dict[Optional[int], SpamPolicy] = {}
+
+    def get(self, guild_id: Optional[int]) -> SpamPolicy:
+        if self._version != self.manager.version:
+            self._policies = {}
+            self._version = self.manager.version
+        policy = self._policies.get(guild_id)
+        if policy is None:
+            policy = self._policies[guild_id] = SpamPolicy.from_config(self.manager, guild_id)
+        return policy
+
+    def forget(self, guild_id: int):
+        self._policies.pop(guild_id, None)
+
+    def __len__(self) -> int:
+        return len(self._policies)
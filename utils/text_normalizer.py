@@ -0,0 +1,113 @@
+import re
+import unicodedata
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+# Lowercase letters that look like Latin ones (uppercase lookalikes get here via casefold).
+# Applied only inside words that mix Latin with another script: plain Russian or
+# Greek text is left as is.
+CONFUSABLES: Dict[str, str] = {
+    # Cyrillic
+    '\u0430': 'a', '\u0432': 'b', '\u0435': 'e', '\u0451': 'e', '\u043a': 'k', '\u043c': 'm',
+    '\u043d': 'h', '\u043e': 'o', '\u0440': 'p', '\u0441': 'c', '\u0442': 't', '\u0443': 'y',
+    '\u0445': 'x', '\u0456': 'i', '\u0457': 'i', '\u0458': 'j', '\u0455': 's', '\u0501': 'd',
+    '\u04bb': 'h', '\u04cf': 'l', '\u051b': 'q', '\u051d': 'w', '\u04af': 'y',
+    # Greek
+    '\u03b1': 'a', '\u03b2': 'b', '\u03b5': 'e', '\u03b7': 'n', '\u03b9': 'i', '\u03ba': 'k',
+    '\u03bd': 'v', '\u03bf': 'o', '\u03c1': 'p', '\u03c4': 't', '\u03c5': 'u', '\u03c7': 'x',
+    '\u03c9': 'w',
+    # Latin
+    '\u0131': 'i', '\u0261': 'g', '\u0251': 'a',
+}
+
+# Invisible characters: zero-width space/joiners, marks, word joiner, soft hyphen, BOM
+INVISIBLE = '\u00ad\u034f\u180e\u200b\u200c\u200d\u200e\u200f\u2060\u2061\u2062\u2063\u2064\ufeff'
+
+# Latin letters that look like Cyrillic ones, for mixed words that are mostly Cyrillic
+LATIN_LOOKALIKES: Dict[str, str] = {
+    'a': '\u0430', 'b': '\u0432', 'c': '\u0441', 'e': '\u0435', 'h': '\u043d', 'k': '\u043a',
+    'm': '\u043c', 'o': '\u043e', 'p': '\u0440', 't': '\u0442', 'x': '\u0445', 'y': '\u0443',
+}
+
+_INVISIBLE = str.maketrans(dict.fromkeys(INVISIBLE))
+_TO_LATIN = str.maketrans(CONFUSABLES)
+_TO_CYRILLIC = str.maketrans(LATIN_LOOKALIKES)
+# Words with at least one Latin letter: the only candidates for mixed-script folding
+_LATIN_WORD = re.compile(r'(?<!\w)\w*[a-z]\w*')
+_LATIN = re.compile('[a-z]')
+
+_SEPARATORS = r"[\s.\-_*\u00b7\u2022|,~+'\"]"
+# Three or more single characters split by separators: "f r e e", "n.i.t.r.o"
+_SPACED = re.compile(r'(?<!\w)\w(?:' + _SEPARATORS + r'+\w(?!\w)){2,}')
+_SEPARATOR = re.compile(_SEPARATORS + '+')
+# Cheap pre-check for _SPACED: two single characters in a row ("a game" does not match)
+_SPACED_HINT = re.compile(_SEPARATORS + r'\w' + _SEPARATORS + r'\w(?:' + _SEPARATORS + '|$)')
+
+
+def _join_spaced(match: 're.Match') -> str:
+    return _SEPARATOR.sub('', match.group())
+
+
+def _fold_mixed(match: 're.Match') -> str:
+    word = match.group()
+    if word.isascii():
+        return word
+    latin = sum(1 for ch in word if 'a' <= ch <= 'z')
+    cyrillic = sum(1 for ch in word if '\u0400' <= ch <= '\u04ff')
+    if latin == 0 or latin == len(word):
+        return word
+    # Fold toward the script most of the word is written in
+    if cyrillic > latin:
+        return word.translate(_TO_CYRILLIC)
+    return word.translate(_TO_LATIN)
+
+
+def normalize_text(text: str) -> str:
+    """Folds text for filtering: NFKC, casefold, no invisible characters.
+
+    Words mixing Latin with Cyrillic or Greek have their lookalike letters
+    folded to the word's main script, so "n\u0456tr\u043e" becomes "nitro"
+    and "\u043f\u0440\u0438\u0432e\u0442" (Latin e) becomes
+    "\u043f\u0440\u0438\u0432\u0435\u0442". Single-script words are never
+    changed, so ordinary Russian cannot turn into Latin blocked words.
+    Runs of whitespace become one space and letter-spaced runs are joined
+    ("N I T R O"). Blocked words must go through the same function.
+    """
+    if text.isascii():
+        text = text.lower()
+    else:
+        if not unicodedata.is_normalized('NFKC', text):
+            text = unicodedata.normalize('NFKC', text)
+        text = text.casefold().translate(_INVISIBLE)
+        if _LATIN.search(text):
+            text = _LATIN_WORD.sub(_fold_mixed, text)
+    if '  ' in text or not text.isprintable():
+        # Newlines, tabs and repeated spaces
+        text = ' '.join(text.split())
+    if _SPACED_HINT.search(text):
+        text = _SPACED.sub(_join_spaced, text)
+    return text
+
+
+class NormalizedTextCache:
+    """Normalized content per message ID, so every filter folds a message once.
+
+    An edited message (same ID, other content) is normalized again.
+    """
+
+    def __init__(self, maxlen: int = 2048):
+        self.maxlen = maxlen
+        self._items: 'OrderedDict[int, Tuple[str, str]]' = OrderedDict()
+
+    def get(self, message_id: int, content: str) -> str:
+        cached: Optional[Tuple[str, str]] = self._items.get(message_id)
+        if cached is not None and cached[0] == content:
+            return cached[1]
+        normalized = normalize_text(content)
+        self._items[message_id] = (content, normalized)
+        if len(self._items) > self.maxlen:
+            self._items.popitem(last=False)
+        return normalized
+
+    def __len__(self) -> int:
+        return len(self._items)
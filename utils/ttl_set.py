@@ -0,0 +1,121 @@
+import time
+from collections import OrderedDict
+from typing import Hashable, Optional
+
+
+class TTLSet:
+    """Set whose entries expire ``ttl`` seconds after being added.
+
+    Entries are kept in insertion order, which is also expiry order, so
+    eviction only ever looks at the oldest end. ``maxlen`` caps memory even
+    when entries arrive faster than they expire.
+    """
+
+    def __init__(self, ttl: float, maxlen: Optional[int] = None):
+        self.ttl = ttl
+        self.maxlen = maxlen
+        self._items: 'OrderedDict[Hashable, float]' = OrderedDict()
+
+    def add(self, key: Hashable, now: Optional[float] = None):
+        now = time.monotonic() if now is None else now
+        self._items.pop(key, None)
+        self._items[key] = now + self.ttl
+        self.purge(now)
+        if self.maxlen is not None:
+            while len(self._items) > self.maxlen:
+                self._items.popitem(last=False)
+
+    def discard(self, key: Hashable):
+        self._items.pop(key, None)
+
+    def purge(self, now: Optional[float] = None) -> int:
+        """Drops expired entries and returns how many were removed."""
+        now = time.monotonic() if now is None else now
+        removed = 0
+        while self._items:
+            key, expires = next(iter(self._items.items()))
+            if expires > now:
+                break
+            del self._items[key]
+            removed += 1
+        return removed
+
+    def __contains__(self, key: Hashable) -> bool:
+        expires = self._items.get(key)
+        if expires is None:
+            return False
+        if expires <= time.monotonic():
+            del self._items[key]
+            return False
+        return True
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+
+class TTLDict:
+    """Dict whose entries expire ``ttl`` seconds after they were last written.
+
+    Written or created entries move to the newest end, so the oldest end is
+    always the next to expire. ``maxlen`` evicts the least recently written
+    entry. With ``default_factory``, ``dict[key]`` creates missing entries like
+    ``defaultdict`` does.
+    """
+
+    def __init__(self, ttl: float, maxlen: Optional[int] = None, default_factory=None):
+        self.ttl = ttl
+        self.maxlen = maxlen
+        self.default_factory = default_factory
+        self._items: 'OrderedDict[Hashable, list]' = OrderedDict()
+
+    def _touch(self, key: Hashable, value, now: float):
+        self._items.pop(key, None)
+        self._items[key] = [now + self.ttl, value]
+        if self.maxlen is not None:
+            while len(self._items) > self.maxlen:
+                self._items.popitem(last=False)
+
+    def __setitem__(self, key: Hashable, value):
+        self._touch(key, value, time.monotonic())
+
+    def __getitem__(self, key: Hashable):
+        now = time.monotonic()
+        entry = self._items.get(key)
+        if entry is not None and entry[0] > now:
+            if self.default_factory is not None:
+                # [] access is treated as a write (e.g. history[key].append)
+                self._touch(key, entry[1], now)
+            return entry[1]
+        if self.default_factory is None:
+            raise KeyError(key)
+        value = self.default_factory()
+        self._touch(key, value, now)
+        return value
+
+    def get(self, key: Hashable, default=None):
+        entry = self._items.get(key)
+        if entry is None or entry[0] <= time.monotonic():
+            return default
+        return entry[1]
+
+    def pop(self, key: Hashable, default=None):
+        entry = self._items.pop(key, None)
+        return default if entry is None else entry[1]
+
+    def purge(self, now: Optional[float] = None) -> int:
+        now = time.monotonic() if now is None else now
+        removed = 0
+        while self._items:
+            key, entry = next(iter(self._items.items()))
+            if entry[0] > now:
+                break
+            del self._items[key]
+            removed += 1
+        return removed
+
+    def __contains__(self, key: Hashable) -> bool:
+        entry = self._items.get(key)
+        return entry is not None and entry[0] > time.monotonic()
+
+    def __len__(self) -> int:
+        return len(self._items)
@@ -0,0 +1,113 @@
+import asyncio
+import logging
+from typing import Collection, Dict, Iterable, Optional
+
+import discord
+
+logger = logging.getLogger('discord_bot')
+
+
+class WebhookInfo:
+    __slots__ = ('id', 'guild_id', 'channel_id', 'owner_id', 'application_id', 'webhook')
+
+    def __init__(self, webhook: discord.Webhook):
+        self.id = webhook.id
+        self.guild_id = webhook.guild_id
+        self.channel_id = webhook.channel_id
+        self.owner_id = webhook.user.id if webhook.user else None
+        self.application_id = getattr(webhook, 'application_id', None)
+        # Kept so the webhook can be deleted without fetching it again
+        self.webhook = webhook
+
+
+class WebhookCache:
+    """Webhook metadata (owner, channel) by webhook ID, so a message costs no REST call.
+
+    Guilds are preloaded with one ``guild.webhooks()`` call; a channel is
+    re-read on ``on_webhooks_update``. A webhook is whitelisted when its
+    creator or owning application is in ``whitelist`` (the live set, so edits
+    to it apply at once). Unknown IDs are fetched once by ``resolve``.
+    """
+
+    def __init__(self, whitelist: Collection[int], preload_concurrency: int = 5):
+        self.whitelist = whitelist
+        self.preload_concurrency = preload_concurrency
+        self.fetches = 0
+        self._webhooks: Dict[int, WebhookInfo] = {}
+        self._loaded = set()
+
+    def __len__(self) -> int:
+        return len(self._webhooks)
+
+    def get(self, webhook_id: int) -> Optional[WebhookInfo]:
+        return self._webhooks.get(webhook_id)
+
+    def is_whitelisted(self, webhook_id: int) -> bool:
+        info = self._webhooks.get(webhook_id)
+        if info is None:
+            return False
+        return info.owner_id in self.whitelist or info.application_id in self.whitelist
+
+    def _store(self, webhooks: Iterable[discord.Webhook]):
+        for webhook in webhooks:
+            self._webhooks[webhook.id] = WebhookInfo(webhook)
+
+    async def preload(self, guild: discord.Guild, force: bool = False) -> bool:
+        """Loads all webhooks of a guild (skipped if already loaded unless ``force``)."""
+        if guild.id in self._loaded and not force:
+            return False
+        if not guild.me.guild_permissions.manage_webhooks:
+            return False
+        try:
+            webhooks = await guild.webhooks()
+        except discord.HTTPException as e:
+            logger.warning(f"Could not load webhooks of {guild.name}: {e}")
+            return False
+        self.fetches += 1
+        self.forget(guild.id)
+        self._store(webhooks)
+        self._loaded.add(guild.id)
+        return True
+
+    async def preload_all(self, guilds: Iterable[discord.Guild]):
+        semaphore = asyncio.Semaphore(self.preload_concurrency)
+
+        async def load(guild):
+            async with semaphore:
+                await self.preload(guild)
+
+        await asyncio.gather(*(load(guild) for guild in guilds))
+
+    async def refresh_channel(self, channel):
+        """Re-reads one channel's webhooks (after a webhook was created, edited or deleted)."""
+        try:
+            webhooks = await channel.webhooks()
+        except discord.HTTPException as e:
+            logger.debug(f"Could not load webhooks of #{channel}: {e}")
+            return
+        self.fetches += 1
+        for webhook_id in [i for i, info in self._webhooks.items() if info.channel_id == channel.id]:
+            del self._webhooks[webhook_id]
+        self._store(webhooks)
+
+    async def resolve(self, bot, webhook_id: int) -> Optional[WebhookInfo]:
+        """Cached info, or one ``fetch_webhook`` for a webhook the cache has not seen."""
+        info = self._webhooks.get(webhook_id)
+        if info is not None:
+            return info
+        try:
+            webhook = await bot.fetch_webhook(webhook_id)
+        except discord.HTTPException as e:
+            logger.debug(f"Could not fetch webhook {webhook_id}: {e}")
+            return None
+        self.fetches += 1
+        info = self._webhooks[webhook_id] = WebhookInfo(webhook)
+        return info
+
+    def remove(self, webhook_id: int):
+        self._webhooks.pop(webhook_id, None)
+
+    def forget(self, guild_id: int):
+        self._loaded.discard(guild_id)
+        for webhook_id in [i for i, info in self._webhooks.items() if info.guild_id == guild_id]:
+            del self._webhooks[webhook_id]
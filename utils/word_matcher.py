@@ -0,0 +1,90 @@
+import re
+from typing import Dict, Iterable, Optional
+
+_END = ''
+# Up to this many words a plain substring loop beats the regex (benchmarks/bench_word_matcher.py)
+LOOP_MAX_WORDS = 256
+
+
+class WordMatcher:
+    """Finds any of a set of words as a substring.
+
+    Short lists (up to ``LOOP_MAX_WORDS``) are checked with a plain ``in``
+    loop, which is faster there. Longer ones are merged into a trie compiled
+    into one regular expression, so a message is scanned once no matter how
+    long the list is.
+    """
+
+    def __init__(self, words: Iterable[str] = ()):
+        self.words = frozenset(w for w in words if w)
+        if len(self.words) <= LOOP_MAX_WORDS:
+            self._scan = tuple(self.words)
+            self._pattern = None
+        else:
+            self._scan = ()
+            self._pattern = self._compile(self.words)
+
+    def __len__(self) -> int:
+        return len(self.words)
+
+    def __bool__(self) -> bool:
+        return bool(self.words)
+
+    @staticmethod
+    def _compile(words) -> Optional['re.Pattern']:
+        if not words:
+            return None
+        trie: Dict[str, dict] = {}
+        for word in words:
+            node = trie
+            for ch in word:
+                node = node.setdefault(ch, {})
+            node[_END] = {}
+        return re.compile(WordMatcher._node_pattern(trie))
+
+    @staticmethod
+    def _node_pattern(node: Dict[str, dict]) -> Optional[str]:
+        # Iterative post-order walk: recursion would hit the limit on long entries.
+        results: Dict[int, Optional[str]] = {}
+        stack = [(node, False)]
+        while stack:
+            current, visited = stack.pop()
+            if not visited:
+                stack.append((current, True))
+                for ch, child in current.items():
+                    if ch != _END:
+                        stack.append((child, False))
+                continue
+
+            branches = []
+            chars = []
+            for ch in sorted(k for k in current if k != _END):
+                sub = results.pop(id(current[ch]))
+                if sub is None:
+                    chars.append(re.escape(ch))
+                else:
+                    branches.append(re.escape(ch) + sub)
+            if chars:
+                branches.append(chars[0] if len(chars) == 1 else '[' + ''.join(chars) + ']')
+
+            if not branches:
+                results[id(current)] = None
+                continue
+            if len(branches) == 1 and (_END not in current or len(branches[0]) == 1 or branches[0].startswith('[')):
+                pattern = branches[0]
+            else:
+                pattern = '(?:' + '|'.join(branches) + ')'
+            if _END in current:
+                pattern += '?'
+            results[id(current)] = pattern
+        return results[id(node)]
+
+    def search(self, text: str) -> Optional[str]:
+        """Returns the first blocked word found in ``text`` or ``None``."""
+        if self._pattern is not None:
+            match = self._pattern.search(text)
+            return match.group() if match else None
+        for word in self._scan:
+            if word in text:
+                return word
+        return None